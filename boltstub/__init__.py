@@ -19,15 +19,20 @@
 # limitations under the License.
 
 
+from asyncio import Event, IncompleteReadError, run as run_async, start_server, wait_for, \
+    TimeoutError as AsyncTimeoutError
 from logging import getLogger
-from socketserver import TCPServer, BaseRequestHandler
+from socket import SHUT_RDWR
+from socketserver import TCPServer, ThreadingMixIn, BaseRequestHandler
 from sys import stdout
+from threading import Lock
+from time import perf_counter
 
 from boltstub.addressing import Address
-from boltstub.packstream import PackStream
+from boltstub.packstream import PackStream, AsyncPackStream
 from boltstub.scripting import ServerExit, ScriptMismatch, BoltScript, \
     ClientMessageLine
-from boltstub.wiring import Wire
+from boltstub.wiring import Wire, AsyncWire
 
 
 log = getLogger(__name__)
@@ -39,18 +44,29 @@ class BoltStubServer(TCPServer):
 
     timed_out = False
 
+    accepted = 0
+
     def __init__(self, *args, **kwargs):
         super(BoltStubServer, self).__init__(*args, **kwargs)
 
     def handle_timeout(self):
         self.timed_out = True
 
-    def server_activate(self):
-        super(BoltStubServer, self).server_activate()
-        # Must be here, testkit waits for something to be written on stdout to
-        # know when the server is listening.
-        print("Listening")
-        stdout.flush()
+    def verify_request(self, request, client_address):
+        self.accepted += 1
+        return True
+
+
+class ThreadingBoltStubServer(ThreadingMixIn, BoltStubServer):
+    """ Stub server that plays the script on a separate thread for each
+    incoming connection, allowing many simultaneous clients.
+    """
+
+    request_queue_size = 128
+
+    # Wait for all connections to finish playing when closing
+    daemon_threads = False
+    block_on_close = True
 
 
 class BoltStubService:
@@ -67,7 +83,8 @@ class BoltStubService:
     def load(cls, *script_filenames, **kwargs):
         return cls(*map(BoltScript.load, script_filenames), **kwargs)
 
-    def __init__(self, script, listen_addr=None, exit_on_disconnect=True, timeout=None):
+    def __init__(self, script, listen_addr=None, exit_on_disconnect=True, timeout=None,
+                 concurrent=False):
         if listen_addr:
             listen_addr = Address.parse(listen_addr)
         else:
@@ -79,7 +96,12 @@ class BoltStubService:
         else:
             self.address = Address((listen_addr.host, listen_addr.port_number))
         self.script = script
+        self.concurrent = concurrent
         self.exceptions = []
+        self.actors = []
+        self.stopped = False
+        self._connections = set()
+        self._connections_lock = Lock()
         service = self
 
         class BoltStubRequestHandler(BaseRequestHandler):
@@ -88,6 +110,8 @@ class BoltStubService:
             server_address = None
 
             def setup(self):
+                with service._connections_lock:
+                    service._connections.add(self.request)
                 self.wire = Wire(self.request)
                 self.client_address = self.wire.remote_address
                 self.server_address = self.wire.local_address
@@ -103,6 +127,7 @@ class BoltStubService:
                     self.wire.write(response)
                     self.wire.send()
                     actor = BoltActor(script, self.wire)
+                    service.actors.append(actor)
                     actor.play()
                 except ServerExit:
                     pass
@@ -110,6 +135,8 @@ class BoltStubService:
                     service.exceptions.append(e)
 
             def finish(self):
+                with service._connections_lock:
+                    service._connections.discard(self.request)
                 log.info("[#%04X]  S: <HANGUP>", self.wire.local_address.port_number)
                 try:
                     self.wire.close()
@@ -118,23 +145,87 @@ class BoltStubService:
                 except AttributeError:
                     pass
 
-        self.server = BoltStubServer(self.address, BoltStubRequestHandler)
+        if concurrent:
+            self.server = ThreadingBoltStubServer(self.address, BoltStubRequestHandler)
+        else:
+            self.server = BoltStubServer(self.address, BoltStubRequestHandler)
         self.server.timeout = timeout or self.default_timeout
 
     def start(self):
-        self.server.handle_request()
+        if self.concurrent:
+            # Keep accepting connections until none has arrived within the
+            # timeout, then wait for those still playing to finish.
+            try:
+                while not self.server.timed_out and not self.stopped:
+                    self.server.handle_request()
+            finally:
+                self.server.server_close()
+        else:
+            try:
+                self.server.handle_request()
+            finally:
+                self.server.server_close()
+
+    def stop(self):
+        """ Stop accepting connections and hang up on any client still
+        playing through the script, from another thread than the one
+        running :meth:`start`.
+        """
+        self.stopped = True
+        with self._connections_lock:
+            sockets = [self.server.socket] + list(self._connections)
+        for s in sockets:
+            try:
+                s.shutdown(SHUT_RDWR)
+            except OSError:
+                pass
 
     @property
     def timed_out(self):
+        if self.concurrent:
+            return self.server.timed_out and not self.server.accepted
         return self.server.timed_out
 
 
+def run(service):
+    """ Run a stub service to completion.
+
+    :return: exit code and message, as reported by the command line tool;
+        0 on success, 1 on a script mismatch, 2 if no client connected
+        within the timeout and 99 on any other error
+    """
+    try:
+        service.start()
+    except Exception as e:
+        return 99, " ".join(map(str, e.args))
+    if service.exceptions:
+        exit_code = 1
+        messages = []
+        for error in service.exceptions:
+            if not isinstance(error, ScriptMismatch):
+                exit_code = 99
+                messages.append(" ".join(map(str, error.args)) or repr(error))
+                continue
+            extra = ""
+            if error.script.filename:
+                extra += " in {!r}".format(error.script.filename)
+            if error.line_no:
+                extra += " at line {}".format(error.line_no)
+            messages.append("Script mismatch{}:\n{}".format(extra, error))
+        return exit_code, "\n".join(messages)
+    if service.timed_out:
+        return 2, "Timed out"
+    return 0, ""
+
+
 class BoltActor:
 
     def __init__(self, script, wire):
         self.script = script
         self.wire = wire
-        self.stream = PackStream(wire)
+        self.stream = PackStream(wire, max_chunk_size=script.chunk_size)
+        # Script lines played, with the number of seconds each one took
+        self.timings = []
 
     @property
     def server_address(self):
@@ -147,6 +238,7 @@ class BoltActor:
                 if not line.is_compatible(protocol_version):
                     raise ValueError("Script line %s is not compatible "
                                      "with protocol version %r" % (line, protocol_version))
+                started = perf_counter()
                 try:
                     line.action(self)
                 except ScriptMismatch as error:
@@ -154,6 +246,7 @@ class BoltActor:
                     error.script = self.script
                     error.line_no = line.line_no
                     raise
+                self.timings.append((line, perf_counter() - started))
             ClientMessageLine.default_action(self)
         except (ConnectionError, OSError):
             # It's likely the client has gone away, so we can
@@ -166,3 +259,137 @@ class BoltActor:
 
     def log_error(self, text, *args):
         log.error("[#%04X]  " + text, self.server_address.port_number, *args)
+
+
+class AsyncBoltStubService:
+    """ Stub service running on a single asyncio event loop, on which any
+    number of simultaneous connections each play through the script
+    independently. The service terminates once no new connection has
+    arrived within the timeout and all connections have finished.
+    """
+
+    default_base_port = 17687
+
+    default_timeout = 30
+
+    backlog = 1024
+
+    @classmethod
+    def load(cls, *script_filenames, **kwargs):
+        return cls(*map(BoltScript.load, script_filenames), **kwargs)
+
+    def __init__(self, script, listen_addr=None, timeout=None, **_):
+        if listen_addr:
+            listen_addr = Address.parse(listen_addr)
+        else:
+            listen_addr = Address(("localhost", self.default_base_port))
+        self.host = listen_addr.host
+        if script.port:
+            self.address = Address((listen_addr.host, script.port))
+        else:
+            self.address = Address((listen_addr.host, listen_addr.port_number))
+        self.script = script
+        self.timeout = timeout or self.default_timeout
+        self.exceptions = []
+        self.actors = []
+        self.accepted = 0
+        self._active = 0
+        self._timed_out = False
+        self._accept_event = None
+        self._idle_event = None
+
+    async def _handle(self, reader, writer):
+        self.accepted += 1
+        self._active += 1
+        self._idle_event.clear()
+        self._accept_event.set()
+        wire = AsyncWire(reader, writer)
+        server_address = wire.local_address
+        log.info("[#%04X]  S: <ACCEPT> %s -> %s", server_address.port_number,
+                 wire.remote_address, server_address)
+        try:
+            request = await wire.read(20)
+            log.info("[#%04X]  C: <HANDSHAKE> %r", server_address.port_number, request)
+            response = self.script.on_handshake(request)
+            log.info("[#%04X]  S: <HANDSHAKE> %r", server_address.port_number, response)
+            wire.write(response)
+            wire.send()
+            await wire.drain()
+            actor = AsyncBoltActor(self.script, wire)
+            self.actors.append(actor)
+            await actor.play()
+        except (ServerExit, IncompleteReadError, ConnectionError, OSError):
+            pass
+        except Exception as e:
+            self.exceptions.append(e)
+        finally:
+            log.info("[#%04X]  S: <HANGUP>", server_address.port_number)
+            try:
+                wire.close()
+            except OSError:
+                pass
+            self._active -= 1
+            if not self._active:
+                self._idle_event.set()
+
+    async def serve(self):
+        self._accept_event = Event()
+        self._idle_event = Event()
+        self._idle_event.set()
+        server = await start_server(self._handle, self.address.host,
+                                    self.address.port_number, backlog=self.backlog,
+                                    reuse_address=True)
+        # Testkit waits for something to be written on stdout to know when
+        # the server is listening.
+        print("Listening")
+        stdout.flush()
+        try:
+            while True:
+                try:
+                    await wait_for(self._accept_event.wait(), self.timeout)
+                except AsyncTimeoutError:
+                    self._timed_out = True
+                    break
+                else:
+                    self._accept_event.clear()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await self._idle_event.wait()
+
+    def start(self):
+        run_async(self.serve())
+
+    @property
+    def timed_out(self):
+        return self._timed_out and not self.accepted
+
+
+class AsyncBoltActor(BoltActor):
+
+    def __init__(self, script, wire):
+        super(AsyncBoltActor, self).__init__(script, wire)
+        self.stream = AsyncPackStream(wire, max_chunk_size=script.chunk_size)
+
+    async def play(self):
+        protocol_version = self.script.protocol_version
+        try:
+            for line in self.script:
+                if not line.is_compatible(protocol_version):
+                    raise ValueError("Script line %s is not compatible "
+                                     "with protocol version %r" % (line, protocol_version))
+                started = perf_counter()
+                try:
+                    await line.async_action(self)
+                    await self.wire.drain()
+                except ScriptMismatch as error:
+                    # Attach context information and re-raise
+                    error.script = self.script
+                    error.line_no = line.line_no
+                    raise
+                self.timings.append((line, perf_counter() - started))
+            await ClientMessageLine.async_default_action(self)
+        except (ConnectionError, OSError, IncompleteReadError):
+            # It's likely the client has gone away, so we can
+            # safely drop out and silence the error.
+            return
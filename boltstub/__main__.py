@@ -19,12 +19,12 @@
 # limitations under the License.
 
 
-from sys import exit
+from sys import exit, stdout
 
 from argparse import ArgumentParser
 from logging import getLogger, INFO
 
-from boltstub import BoltStubService
+from boltstub import AsyncBoltStubService, BoltStubService, run
 from boltstub.scripting import BoltScript
 from boltstub.watcher import watch
 
@@ -54,6 +54,15 @@ useful for Bolt client integration testing.
                         help="The number of seconds for which the stub server will run "
                              "before automatically terminating. If unspecified, the "
                              "server will wait for 30 seconds.")
+    parser.add_argument("-c", "--concurrent", action="store_true",
+                        help="Accept any number of simultaneous connections, each "
+                             "playing through the script independently. The server "
+                             "terminates once no new connection has arrived within "
+                             "the timeout.")
+    parser.add_argument("-a", "--asyncio", action="store_true",
+                        help="Serve connections on a single asyncio event loop rather "
+                             "than a thread per connection. Like --concurrent, any "
+                             "number of simultaneous connections is accepted.")
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Show more detail about the client-server exchange.")
     parser.add_argument("script", nargs="+")
@@ -63,29 +72,27 @@ useful for Bolt client integration testing.
         watch("boltstub", INFO)
 
     scripts = map(BoltScript.load, parsed.script)
-    service = BoltStubService(*scripts, listen_addr=parsed.listen_addr, timeout=parsed.timeout)
+    if parsed.asyncio:
+        service_class = AsyncBoltStubService
+    else:
+        service_class = BoltStubService
+    service = service_class(*scripts, listen_addr=parsed.listen_addr, timeout=parsed.timeout,
+                            concurrent=parsed.concurrent)
+    if service_class is BoltStubService:
+        # Testkit waits for something to be written on stdout to know when
+        # the server is listening, the socket is bound on construction.
+        print("Listening")
+        stdout.flush()
     try:
-        service.start()
+        exit_code, message = run(service)
     except KeyboardInterrupt:
         exit(130)
-    except Exception as e:
-        log.error(" ".join(map(str, e.args)))
+    if exit_code == 99:
+        log.error(message)
         log.error("\r\n")
-        exit(99)
-
-    if service.exceptions:
-        for error in service.exceptions:
-            extra = ""
-            if error.script.filename:
-                extra += " in {!r}".format(error.script.filename)
-            if error.line_no:
-                extra += " at line {}".format(error.line_no)
-            print("Script mismatch{}:\n{}".format(extra, error))
-        exit(1)
-
-    if service.timed_out:
-        print("Timed out")
-        exit(2)
+    elif exit_code:
+        print(message)
+    exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+# Copyright (c) 2002-2020 "Neo4j,"
+# Neo4j Sweden AB [http://neo4j.com]
+#
+# This file is part of Neo4j.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Micro-benchmarks for the PackStream implementation, run with:
+
+    python -m boltstub.benchmark
+
+Each workload is a stream of RECORD messages, as sent by a stub server
+streaming a large result.
+"""
+
+
+from argparse import ArgumentParser
+from time import perf_counter
+
+from boltstub.packstream import Packer, Structure, UnpackableBuffer, Unpacker
+
+
+WORKLOADS = {
+    "small": [1, "a"],
+    "wide": [i if i % 2 else "field %d" % i for i in range(100)],
+    "nested": [{"id": 1, "labels": ["A", "B"], "props": {
+        "name": "Alice", "age": 33, "score": 1.5, "tags": ["x", "y", "z"],
+        "address": {"city": "Malmö", "zip": 21119, "geo": [55.6, 13.0]},
+    }}],
+    "bytes": [b"\x00" * 1024, None, True, -1, 2 ** 40],
+}
+
+
+def records(workload, n_records):
+    fields = WORKLOADS[workload]
+    return [Structure(b"\x71", fields) for _ in range(n_records)]
+
+
+def pack_records(messages):
+    packer = Packer()
+    for message in messages:
+        packer.pack(message)
+    return bytes(packer.data)
+
+
+def unpack_records(data, n_records):
+    unpacker = Unpacker(UnpackableBuffer(memoryview(data)))
+    for _ in range(n_records):
+        unpacker.unpack()
+
+
+def timed(f, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = perf_counter()
+        f(*args)
+        t = perf_counter() - t0
+        if best is None or t < best:
+            best = t
+    return best
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark PackStream packing and "
+                                        "unpacking of RECORD message streams.")
+    parser.add_argument("-n", "--records", type=int, default=100000,
+                        help="Number of records per workload (default 100000).")
+    parser.add_argument("workload", nargs="*",
+                        help="Workloads to run, any of %s (default all)." %
+                             ", ".join(sorted(WORKLOADS)))
+    parsed = parser.parse_args()
+    for workload in parsed.workload:
+        if workload not in WORKLOADS:
+            parser.error("unknown workload %r" % workload)
+    n = parsed.records
+    print("%-8s %10s %14s %14s" % ("workload", "bytes", "unpack rec/s", "pack rec/s"))
+    for workload in parsed.workload or sorted(WORKLOADS):
+        messages = records(workload, n)
+        data = pack_records(messages)
+        unpack_time = timed(unpack_records, data, n)
+        pack_time = timed(pack_records, messages)
+        print("%-8s %10d %14.0f %14.0f" % (workload, len(data), n / unpack_time, n / pack_time))
+
+
+if __name__ == "__main__":
+    main()
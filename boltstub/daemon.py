@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2002-2020 "Neo4j,"
+# Neo4j Sweden AB [http://neo4j.com]
+#
+# This file is part of Neo4j.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Long-lived process running any number of stub servers on request, run with:
+
+    python -m boltstub.daemon -l localhost:0
+
+Once listening, "Listening HOST:PORT" is written to stdout. Clients connect
+to that address and send requests, each answered in turn, as JSON objects on
+a line of their own:
+
+    {"name": "start", "script": "...", "listen": "0.0.0.0:9001", "timeout": 30}
+    {"port": 9001}
+
+    {"name": "done", "port": 9001, "timeout": 20}
+    {"exit_code": 0, "output": "..."}
+
+    {"name": "kill", "port": 9001}
+    {"output": "..."}
+
+    {"name": "reserve", "host": "0.0.0.0"}
+    {"port": 40123}
+
+    {"name": "release", "port": 40123}
+    {}
+
+A reserved port is a free port chosen by the system, which is held by the
+daemon for stub servers to be started on until released. This allows any
+number of stub servers to run side by side without fixed port numbers.
+
+A "start" request is answered once the stub server is listening. Exit codes
+are those of `python -m boltstub`, except for a null exit code if the stub
+server was still running at the end of the "done" timeout, in which case it
+is killed. Failed requests are answered with {"error": "..."}.
+"""
+
+
+from argparse import ArgumentParser
+from json import dumps, loads
+from logging import Formatter, Handler, INFO, getLogger
+from socket import socket
+from socketserver import StreamRequestHandler, TCPServer, ThreadingMixIn
+import sys
+from sys import exit, stderr, stdout
+from threading import Event, Lock, Thread
+
+from boltstub import BoltStubService, run
+from boltstub.addressing import Address
+from boltstub.scripting import BoltScript
+from boltstub.watcher import watch
+
+
+class StubLogHandler(Handler):
+    """ Collects the log of each stub server, by the port number with which
+    every stub server log record starts.
+    """
+
+    def __init__(self):
+        super(StubLogHandler, self).__init__()
+        self.setFormatter(Formatter("%(asctime)s  %(message)s", "%H:%M:%S"))
+        self.lines = {}
+
+    def open(self, port):
+        self.lines[port] = []
+
+    def collect(self, port):
+        return "\n".join(self.lines.pop(port, []))
+
+    def emit(self, record):
+        try:
+            lines = self.lines[record.args[0]]
+        except (IndexError, KeyError, TypeError):
+            return
+        lines.append(self.format(record))
+
+
+class Stub:
+
+    def __init__(self, service):
+        self.service = service
+        self.exit_code = None
+        self.message = ""
+        self.finished = Event()
+        self.thread = Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            self.exit_code, self.message = run(self.service)
+        except Exception as e:
+            self.exit_code, self.message = 99, " ".join(map(str, e.args)) or repr(e)
+        finally:
+            self.finished.set()
+
+
+class StubControlHandler(StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = loads(line.decode("utf-8"))
+                response = self.server.dispatch(request)
+            except Exception as e:
+                response = {"error": " ".join(map(str, e.args)) or repr(e)}
+            self.wfile.write(dumps(response).encode("utf-8") + b"\n")
+
+
+class StubDaemon(ThreadingMixIn, TCPServer):
+
+    allow_reuse_address = True
+
+    daemon_threads = True
+
+    default_done_timeout = 20
+
+    def __init__(self, address):
+        super(StubDaemon, self).__init__(address, StubControlHandler)
+        self.stubs = {}
+        self.scripts = {}
+        # Reserved ports, held by a bound socket while no stub server runs
+        self.reserved = {}
+        self.lock = Lock()
+        self.log_handler = StubLogHandler()
+        logger = getLogger("boltstub")
+        logger.addHandler(self.log_handler)
+        logger.setLevel(INFO)
+
+    def dispatch(self, request):
+        name = request.get("name")
+        if name == "start":
+            port = self.start_stub(request["script"], request.get("listen"),
+                                   request.get("timeout"), request.get("filename"))
+            return {"port": port}
+        elif name == "done":
+            exit_code, output = self.wait_stub(request["port"], request.get("timeout"))
+            return {"exit_code": exit_code, "output": output}
+        elif name == "kill":
+            _, output = self.wait_stub(request["port"], 0)
+            return {"output": output}
+        elif name == "reserve":
+            return {"port": self.reserve_port(request.get("host", "0.0.0.0"))}
+        elif name == "release":
+            self.release_port(request["port"])
+            return {}
+        else:
+            raise ValueError("Unknown request %r" % (name,))
+
+    def parse(self, source, filename):
+        # Scripts are immutable once parsed, so may be shared by stub servers
+        key = (source, filename)
+        try:
+            return self.scripts[key]
+        except KeyError:
+            script = BoltScript.parse(source)
+            script.filename = filename or ""
+            self.scripts[key] = script
+            return script
+
+    def reserve_port(self, host):
+        s = socket()
+        s.bind((host, 0))
+        port = s.getsockname()[1]
+        with self.lock:
+            self.reserved[port] = s
+        return port
+
+    def release_port(self, port):
+        with self.lock:
+            s = self.reserved.pop(port, None)
+        if s:
+            s.close()
+
+    def _hold_port(self, port):
+        # Bind a reserved port again once its stub server has finished
+        with self.lock:
+            if port not in self.reserved or self.reserved[port]:
+                return
+            s = socket()
+            try:
+                s.bind(("0.0.0.0", port))
+            except OSError:
+                s.close()
+            else:
+                self.reserved[port] = s
+
+    def start_stub(self, source, listen_addr, timeout, filename):
+        script = self.parse(source, filename)
+        address = Address.parse(listen_addr or ":0")
+        with self.lock:
+            held = self.reserved.get(address.port_number)
+            if held:
+                self.reserved[address.port_number] = None
+                held.close()
+        try:
+            service = BoltStubService(script, listen_addr=listen_addr, timeout=timeout)
+        except Exception:
+            self._hold_port(address.port_number)
+            raise
+        port = service.server.server_address[1]
+        stub = Stub(service)
+        with self.lock:
+            previous = self.stubs.get(port)
+            if previous and not previous.finished.is_set():
+                service.server.server_close()
+                raise ValueError("Stub server already running on port %d" % port)
+            self.stubs[port] = stub
+            self.log_handler.open(port)
+        stub.thread.start()
+        return port
+
+    def wait_stub(self, port, timeout):
+        with self.lock:
+            stub = self.stubs.get(port)
+        if stub is None:
+            raise ValueError("No stub server on port %d" % port)
+        if timeout is None:
+            timeout = self.default_done_timeout
+        exit_code = None
+        if stub.finished.wait(timeout):
+            exit_code = stub.exit_code
+        else:
+            stub.service.stop()
+            stub.finished.wait()
+        with self.lock:
+            if self.stubs.get(port) is stub:
+                del self.stubs[port]
+            output = self.log_handler.collect(port)
+        self._hold_port(port)
+        if exit_code and stub.message:
+            output = "\n".join(filter(None, [output, stub.message]))
+        return exit_code, output
+
+
+def main():
+    parser = ArgumentParser(description="""\
+Run a Bolt stub server daemon.
+
+The daemon starts stub servers on request of clients connected to its control
+address, and reports on their outcome, without the cost of starting a new
+process for every stub server.
+""")
+    parser.add_argument("-l", "--listen-addr", default="localhost:0",
+                        help="The control address, in INTERFACE:PORT format. Defaults "
+                             "to 'localhost:0', for any free port.")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Show the client-server exchanges on stderr.")
+    parsed = parser.parse_args()
+
+    if parsed.verbose:
+        watch("boltstub", INFO, stderr)
+
+    address = Address.parse(parsed.listen_addr)
+    server = StubDaemon((address.host, address.port_number))
+    host, port = server.server_address[:2]
+    print("Listening %s:%d" % (host, port))
+    stdout.flush()
+    # Nothing reads stdout from here on, so keep stray output off that pipe
+    sys.stdout = stderr
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,9 +19,7 @@
 # limitations under the License.
 
 
-from codecs import decode
-from io import BytesIO
-from struct import pack as struct_pack, unpack as struct_unpack
+from struct import Struct, pack as struct_pack, unpack as struct_unpack
 
 
 PACKED_UINT_8 = [struct_pack(">B", value) for value in range(0x100)]
@@ -38,6 +36,27 @@ UNPACKED_MARKERS.update({bytes(bytearray([z + 256])): z for z in range(-0x10, 0x
 INT64_MIN = -(2 ** 63)
 INT64_MAX = 2 ** 63
 
+MAX_CHUNK_SIZE = 0xFFFF
+
+# Precompiled structs for packing a marker byte followed by a value
+MARKED_FLOAT_64 = Struct(">Bd")
+MARKED_INT_16 = Struct(">Bh")
+MARKED_INT_32 = Struct(">Bi")
+MARKED_INT_64 = Struct(">Bq")
+MARKED_UINT_16 = Struct(">BH")
+MARKED_UINT_32 = Struct(">BI")
+
+# Precompiled structs for unpacking, indexed by the low bits of sized
+# markers and by marker for fixed width values respectively
+SIZE_STRUCTS = [Struct(">B"), Struct(">H"), Struct(">I")]
+FIXED_WIDTH_STRUCTS = {
+    0xC1: Struct(">d"),
+    0xC8: Struct(">b"),
+    0xC9: Struct(">h"),
+    0xCA: Struct(">i"),
+    0xCB: Struct(">q"),
+}
+
 
 EndOfStream = object()
 
@@ -71,295 +90,179 @@ class Structure:
 
 
 class Packer:
+    """ Packer appending to a single bytearray, dispatching on the exact
+    type of each value.
+    """
 
-    def __init__(self, stream):
-        self.stream = stream
-        self._write = self.stream.write
+    def __init__(self, data=None):
+        if data is None:
+            data = bytearray()
+        self.data = data
 
     def pack_raw(self, data):
-        self._write(data)
+        self.data += data
 
     def pack(self, value):
         return self._pack(value)
 
     def _pack(self, value):
-        write = self._write
-
-        # None
-        if value is None:
-            write(b"\xC0")  # NULL
-
-        # Boolean
-        elif value is True:
-            write(b"\xC3")
-        elif value is False:
-            write(b"\xC2")
-
-        # Float (only double precision is supported)
-        elif isinstance(value, float):
-            write(b"\xC1")
-            write(struct_pack(">d", value))
-
-        # Integer
-        elif isinstance(value, int):
-            if -0x10 <= value < 0x80:
-                write(PACKED_UINT_8[value % 0x100])
-            elif -0x80 <= value < -0x10:
-                write(b"\xC8")
-                write(PACKED_UINT_8[value % 0x100])
-            elif -0x8000 <= value < 0x8000:
-                write(b"\xC9")
-                write(PACKED_UINT_16[value % 0x10000])
-            elif -0x80000000 <= value < 0x80000000:
-                write(b"\xCA")
-                write(struct_pack(">i", value))
-            elif INT64_MIN <= value < INT64_MAX:
-                write(b"\xCB")
-                write(struct_pack(">q", value))
-            else:
-                raise OverflowError("Integer %s out of range" % value)
-
-        # String
-        elif isinstance(value, str):
-            encoded = value.encode("utf-8")
-            self.pack_string_header(len(encoded))
-            self.pack_raw(encoded)
-
-        # Bytes
-        elif isinstance(value, bytes):
-            self.pack_bytes_header(len(value))
-            self.pack_raw(value)
-        elif isinstance(value, bytearray):
-            self.pack_bytes_header(len(value))
-            self.pack_raw(bytes(value))
-
-        # List
-        elif isinstance(value, list):
-            self.pack_list_header(len(value))
-            for item in value:
-                self._pack(item)
-
-        # Map
-        elif isinstance(value, dict):
-            self.pack_map_header(len(value))
-            for key, item in value.items():
-                self._pack(key)
-                self._pack(item)
-
-        # Structure
-        elif isinstance(value, Structure):
-            self.pack_struct(value.tag, value.fields)
-
-        # Other
+        try:
+            handler = self._handlers[type(value)]
+        except KeyError:
+            handler = self._handler_for_subclass(type(value))
+        handler(self, value)
+
+    @classmethod
+    def _handler_for_subclass(cls, t):
+        for base, handler in cls._subclass_handlers:
+            if issubclass(t, base):
+                cls._handlers[t] = handler
+                return handler
+        raise ValueError("Values of type %s are not supported" % t)
+
+    def _pack_none(self, _):
+        self.data.append(0xC0)
+
+    def _pack_bool(self, value):
+        self.data.append(0xC3 if value else 0xC2)
+
+    def _pack_float(self, value):
+        # Only double precision is supported
+        self.data += MARKED_FLOAT_64.pack(0xC1, value)
+
+    def _pack_int(self, value):
+        data = self.data
+        if -0x10 <= value < 0x80:
+            data.append(value & 0xFF)
+        elif -0x80 <= value < -0x10:
+            data.append(0xC8)
+            data.append(value & 0xFF)
+        elif -0x8000 <= value < 0x8000:
+            data += MARKED_INT_16.pack(0xC9, value)
+        elif -0x80000000 <= value < 0x80000000:
+            data += MARKED_INT_32.pack(0xCA, value)
+        elif INT64_MIN <= value < INT64_MAX:
+            data += MARKED_INT_64.pack(0xCB, value)
         else:
-            raise ValueError("Values of type %s are not supported" % type(value))
+            raise OverflowError("Integer %s out of range" % value)
 
-    def pack_bytes_header(self, size):
-        write = self._write
+    def _pack_str(self, value):
+        encoded = value.encode("utf-8")
+        size = len(encoded)
+        if size < 0x10:
+            self.data.append(0x80 + size)
+        else:
+            self._pack_sized_header(size, 0xD0, "String")
+        self.data += encoded
+
+    def _pack_bytes(self, value):
+        self.pack_bytes_header(len(value))
+        self.data += value
+
+    def _pack_list(self, value):
+        self.pack_list_header(len(value))
+        pack = self._pack
+        for item in value:
+            pack(item)
+
+    def _pack_dict(self, value):
+        self.pack_map_header(len(value))
+        pack = self._pack
+        for key, item in value.items():
+            pack(key)
+            pack(item)
+
+    def _pack_structure(self, value):
+        self.pack_struct(value.tag, value.fields)
+
+    _handlers = {
+        type(None): _pack_none,
+        bool: _pack_bool,
+        float: _pack_float,
+        int: _pack_int,
+        str: _pack_str,
+        bytes: _pack_bytes,
+        bytearray: _pack_bytes,
+        list: _pack_list,
+        dict: _pack_dict,
+        Structure: _pack_structure,
+    }
+
+    # Checked in order for subclasses of the supported types
+    _subclass_handlers = [
+        (bool, _pack_bool),
+        (float, _pack_float),
+        (int, _pack_int),
+        (str, _pack_str),
+        (bytes, _pack_bytes),
+        (bytearray, _pack_bytes),
+        (list, _pack_list),
+        (dict, _pack_dict),
+        (Structure, _pack_structure),
+    ]
+
+    def _pack_sized_header(self, size, marker_8, kind):
+        # Markers for 8, 16 and 32 bit sizes are consecutive
+        data = self.data
         if size < 0x100:
-            write(b"\xCC")
-            write(PACKED_UINT_8[size])
+            data.append(marker_8)
+            data.append(size)
         elif size < 0x10000:
-            write(b"\xCD")
-            write(PACKED_UINT_16[size])
+            data += MARKED_UINT_16.pack(marker_8 + 1, size)
         elif size < 0x100000000:
-            write(b"\xCE")
-            write(struct_pack(">I", size))
+            data += MARKED_UINT_32.pack(marker_8 + 2, size)
         else:
-            raise OverflowError("Bytes header size out of range")
+            raise OverflowError("%s header size out of range" % kind)
+
+    def pack_bytes_header(self, size):
+        self._pack_sized_header(size, 0xCC, "Bytes")
 
     def pack_string_header(self, size):
-        write = self._write
-        if size == 0x00:
-            write(b"\x80")
-        elif size == 0x01:
-            write(b"\x81")
-        elif size == 0x02:
-            write(b"\x82")
-        elif size == 0x03:
-            write(b"\x83")
-        elif size == 0x04:
-            write(b"\x84")
-        elif size == 0x05:
-            write(b"\x85")
-        elif size == 0x06:
-            write(b"\x86")
-        elif size == 0x07:
-            write(b"\x87")
-        elif size == 0x08:
-            write(b"\x88")
-        elif size == 0x09:
-            write(b"\x89")
-        elif size == 0x0A:
-            write(b"\x8A")
-        elif size == 0x0B:
-            write(b"\x8B")
-        elif size == 0x0C:
-            write(b"\x8C")
-        elif size == 0x0D:
-            write(b"\x8D")
-        elif size == 0x0E:
-            write(b"\x8E")
-        elif size == 0x0F:
-            write(b"\x8F")
-        elif size < 0x100:
-            write(b"\xD0")
-            write(PACKED_UINT_8[size])
-        elif size < 0x10000:
-            write(b"\xD1")
-            write(PACKED_UINT_16[size])
-        elif size < 0x100000000:
-            write(b"\xD2")
-            write(struct_pack(">I", size))
+        if size < 0x10:
+            self.data.append(0x80 + size)
         else:
-            raise OverflowError("String header size out of range")
+            self._pack_sized_header(size, 0xD0, "String")
 
     def pack_list_header(self, size):
-        write = self._write
-        if size == 0x00:
-            write(b"\x90")
-        elif size == 0x01:
-            write(b"\x91")
-        elif size == 0x02:
-            write(b"\x92")
-        elif size == 0x03:
-            write(b"\x93")
-        elif size == 0x04:
-            write(b"\x94")
-        elif size == 0x05:
-            write(b"\x95")
-        elif size == 0x06:
-            write(b"\x96")
-        elif size == 0x07:
-            write(b"\x97")
-        elif size == 0x08:
-            write(b"\x98")
-        elif size == 0x09:
-            write(b"\x99")
-        elif size == 0x0A:
-            write(b"\x9A")
-        elif size == 0x0B:
-            write(b"\x9B")
-        elif size == 0x0C:
-            write(b"\x9C")
-        elif size == 0x0D:
-            write(b"\x9D")
-        elif size == 0x0E:
-            write(b"\x9E")
-        elif size == 0x0F:
-            write(b"\x9F")
-        elif size < 0x100:
-            write(b"\xD4")
-            write(PACKED_UINT_8[size])
-        elif size < 0x10000:
-            write(b"\xD5")
-            write(PACKED_UINT_16[size])
-        elif size < 0x100000000:
-            write(b"\xD6")
-            write(struct_pack(">I", size))
+        if size < 0x10:
+            self.data.append(0x90 + size)
         else:
-            raise OverflowError("List header size out of range")
+            self._pack_sized_header(size, 0xD4, "List")
 
     def pack_list_stream_header(self):
-        self._write(b"\xD7")
+        self.data.append(0xD7)
 
     def pack_map_header(self, size):
-        write = self._write
-        if size == 0x00:
-            write(b"\xA0")
-        elif size == 0x01:
-            write(b"\xA1")
-        elif size == 0x02:
-            write(b"\xA2")
-        elif size == 0x03:
-            write(b"\xA3")
-        elif size == 0x04:
-            write(b"\xA4")
-        elif size == 0x05:
-            write(b"\xA5")
-        elif size == 0x06:
-            write(b"\xA6")
-        elif size == 0x07:
-            write(b"\xA7")
-        elif size == 0x08:
-            write(b"\xA8")
-        elif size == 0x09:
-            write(b"\xA9")
-        elif size == 0x0A:
-            write(b"\xAA")
-        elif size == 0x0B:
-            write(b"\xAB")
-        elif size == 0x0C:
-            write(b"\xAC")
-        elif size == 0x0D:
-            write(b"\xAD")
-        elif size == 0x0E:
-            write(b"\xAE")
-        elif size == 0x0F:
-            write(b"\xAF")
-        elif size < 0x100:
-            write(b"\xD8")
-            write(PACKED_UINT_8[size])
-        elif size < 0x10000:
-            write(b"\xD9")
-            write(PACKED_UINT_16[size])
-        elif size < 0x100000000:
-            write(b"\xDA")
-            write(struct_pack(">I", size))
+        if size < 0x10:
+            self.data.append(0xA0 + size)
         else:
-            raise OverflowError("Map header size out of range")
+            self._pack_sized_header(size, 0xD8, "Map")
 
     def pack_map_stream_header(self):
-        self._write(b"\xDB")
+        self.data.append(0xDB)
 
     def pack_struct(self, signature, fields):
         if len(signature) != 1 or not isinstance(signature, bytes):
             raise ValueError("Structure signature must be a single byte value")
-        write = self._write
         size = len(fields)
-        if size == 0x00:
-            write(b"\xB0")
-        elif size == 0x01:
-            write(b"\xB1")
-        elif size == 0x02:
-            write(b"\xB2")
-        elif size == 0x03:
-            write(b"\xB3")
-        elif size == 0x04:
-            write(b"\xB4")
-        elif size == 0x05:
-            write(b"\xB5")
-        elif size == 0x06:
-            write(b"\xB6")
-        elif size == 0x07:
-            write(b"\xB7")
-        elif size == 0x08:
-            write(b"\xB8")
-        elif size == 0x09:
-            write(b"\xB9")
-        elif size == 0x0A:
-            write(b"\xBA")
-        elif size == 0x0B:
-            write(b"\xBB")
-        elif size == 0x0C:
-            write(b"\xBC")
-        elif size == 0x0D:
-            write(b"\xBD")
-        elif size == 0x0E:
-            write(b"\xBE")
-        elif size == 0x0F:
-            write(b"\xBF")
-        else:
+        if size >= 0x10:
             raise OverflowError("Structure size out of range")
-        write(signature)
+        data = self.data
+        data.append(0xB0 + size)
+        data += signature
+        pack = self._pack
         for field in fields:
-            self._pack(field)
+            pack(field)
 
     def pack_end_of_stream(self):
-        self._write(b"\xDF")
+        self.data.append(0xDF)
 
 
 class Unpacker:
+    """ Unpacker driven by a table of handlers, indexed by marker byte.
+    Values are read straight from the data of the underlying
+    :class:`.UnpackableBuffer` at its current position.
+    """
 
     def __init__(self, unpackable):
         self.unpackable = unpackable
@@ -377,164 +280,147 @@ class Unpacker:
         return self._unpack()
 
     def _unpack(self):
-        marker = self.read_u8()
-
-        if marker == -1:
+        buffer = self.unpackable
+        p = buffer.p
+        if p >= buffer.used:
             raise ValueError("Nothing to unpack")
-
-        # Tiny Integer
-        if 0x00 <= marker <= 0x7F:
+        marker = buffer.data[p]
+        buffer.p = p + 1
+        if marker < 0x80:
+            # Tiny Integer, the most common case by far
             return marker
-        elif 0xF0 <= marker <= 0xFF:
-            return marker - 0x100
-
-        # Null
-        elif marker == 0xC0:
-            return None
-
-        # Float
-        elif marker == 0xC1:
-            value, = struct_unpack(">d", self.read(8))
-            return value
-
-        # Boolean
-        elif marker == 0xC2:
-            return False
-        elif marker == 0xC3:
-            return True
-
-        # Integer
-        elif marker == 0xC8:
-            return struct_unpack(">b", self.read(1))[0]
-        elif marker == 0xC9:
-            return struct_unpack(">h", self.read(2))[0]
-        elif marker == 0xCA:
-            return struct_unpack(">i", self.read(4))[0]
-        elif marker == 0xCB:
-            return struct_unpack(">q", self.read(8))[0]
-
-        # Bytes
-        elif marker == 0xCC:
-            size, = struct_unpack(">B", self.read(1))
-            return self.read(size).tobytes()
-        elif marker == 0xCD:
-            size, = struct_unpack(">H", self.read(2))
-            return self.read(size).tobytes()
-        elif marker == 0xCE:
-            size, = struct_unpack(">I", self.read(4))
-            return self.read(size).tobytes()
-
-        else:
-            marker_high = marker & 0xF0
-            # String
-            if marker_high == 0x80:  # TINY_STRING
-                return decode(self.read(marker & 0x0F), "utf-8")
-            elif marker == 0xD0:  # STRING_8:
-                size, = struct_unpack(">B", self.read(1))
-                return decode(self.read(size), "utf-8")
-            elif marker == 0xD1:  # STRING_16:
-                size, = struct_unpack(">H", self.read(2))
-                return decode(self.read(size), "utf-8")
-            elif marker == 0xD2:  # STRING_32:
-                size, = struct_unpack(">I", self.read(4))
-                return decode(self.read(size), "utf-8")
-
-            # List
-            elif 0x90 <= marker <= 0x9F or 0xD4 <= marker <= 0xD7:
-                return list(self._unpack_list_items(marker))
-
-            # Map
-            elif 0xA0 <= marker <= 0xAF or 0xD8 <= marker <= 0xDB:
-                return self._unpack_map(marker)
-
-            # Structure
-            elif 0xB0 <= marker <= 0xBF:
-                size, tag = self._unpack_structure_header(marker)
-                value = Structure(tag, *([None] * size))
-                for i in range(len(value)):
-                    value[i] = self._unpack()
-                return value
-
-            elif marker == 0xDF:  # END_OF_STREAM:
-                return EndOfStream
-
-            else:
-                raise ValueError("Unknown PackStream marker %02X" % marker)
-
-    def _unpack_list_items(self, marker):
-        marker_high = marker & 0xF0
-        if marker_high == 0x90:
-            size = marker & 0x0F
-            if size == 0:
-                return
-            elif size == 1:
-                yield self._unpack()
-            else:
-                for _ in range(size):
-                    yield self._unpack()
-        elif marker == 0xD4:  # LIST_8:
-            size, = struct_unpack(">B", self.read(1))
-            for _ in range(size):
-                yield self._unpack()
-        elif marker == 0xD5:  # LIST_16:
-            size, = struct_unpack(">H", self.read(2))
-            for _ in range(size):
-                yield self._unpack()
-        elif marker == 0xD6:  # LIST_32:
-            size, = struct_unpack(">I", self.read(4))
-            for _ in range(size):
-                yield self._unpack()
-        elif marker == 0xD7:  # LIST_STREAM:
-            item = None
-            while item is not EndOfStream:
-                item = self._unpack()
-                if item is not EndOfStream:
-                    yield item
-        else:
-            return
+        return self._handlers[marker](self, marker)
+
+    def _read_size(self, struct):
+        buffer = self.unpackable
+        size, = struct.unpack_from(buffer.data, buffer.p)
+        buffer.p += struct.size
+        return size
+
+    def _read_bytes(self, size):
+        buffer = self.unpackable
+        p = buffer.p
+        q = p + size
+        buffer.p = q
+        return buffer.data[p:q]
+
+    def _unpack_unknown(self, marker):
+        raise ValueError("Unknown PackStream marker %02X" % marker)
+
+    def _unpack_tiny_int(self, marker):
+        return marker
+
+    def _unpack_negative_tiny_int(self, marker):
+        return marker - 0x100
+
+    def _unpack_null(self, _):
+        return None
+
+    def _unpack_false(self, _):
+        return False
+
+    def _unpack_true(self, _):
+        return True
+
+    def _unpack_end_of_stream(self, _):
+        return EndOfStream
+
+    def _unpack_fixed(self, marker):
+        # Float and sized Integer, fixed width values
+        struct = FIXED_WIDTH_STRUCTS[marker]
+        buffer = self.unpackable
+        value, = struct.unpack_from(buffer.data, buffer.p)
+        buffer.p += struct.size
+        return value
+
+    def _unpack_bytes(self, marker):
+        size = self._read_size(SIZE_STRUCTS[marker & 0x03])
+        return bytes(self._read_bytes(size))
+
+    def _unpack_tiny_string(self, marker):
+        buffer = self.unpackable
+        p = buffer.p
+        q = buffer.p = p + (marker & 0x0F)
+        return str(buffer.data[p:q], "utf-8")
+
+    def _unpack_string(self, marker):
+        size = self._read_size(SIZE_STRUCTS[marker & 0x03])
+        return str(self._read_bytes(size), "utf-8")
+
+    def _unpack_tiny_list(self, marker):
+        unpack = self._unpack
+        return [unpack() for _ in range(marker & 0x0F)]
+
+    def _unpack_list(self, marker):
+        unpack = self._unpack
+        return [unpack() for _ in range(self._read_size(SIZE_STRUCTS[marker & 0x03]))]
+
+    def _unpack_list_stream(self, _):
+        unpack = self._unpack
+        value = []
+        item = unpack()
+        while item is not EndOfStream:
+            value.append(item)
+            item = unpack()
+        return value
+
+    def _unpack_tiny_map(self, marker):
+        unpack = self._unpack
+        value = {}
+        for _ in range(marker & 0x0F):
+            key = unpack()
+            value[key] = unpack()
+        return value
+
+    def _unpack_sized_map(self, marker):
+        unpack = self._unpack
+        value = {}
+        for _ in range(self._read_size(SIZE_STRUCTS[marker & 0x03])):
+            key = unpack()
+            value[key] = unpack()
+        return value
+
+    def _unpack_map_stream(self, _):
+        unpack = self._unpack
+        value = {}
+        key = unpack()
+        while key is not EndOfStream:
+            value[key] = unpack()
+            key = unpack()
+        return value
+
+    def _unpack_structure(self, marker):
+        size, tag = self._unpack_structure_header(marker)
+        unpack = self._unpack
+        return Structure(tag, *[unpack() for _ in range(size)])
+
+    _handlers = [_unpack_unknown] * 0x100
+    _handlers[0x00:0x80] = [_unpack_tiny_int] * 0x80
+    _handlers[0x80:0x90] = [_unpack_tiny_string] * 0x10
+    _handlers[0x90:0xA0] = [_unpack_tiny_list] * 0x10
+    _handlers[0xA0:0xB0] = [_unpack_tiny_map] * 0x10
+    _handlers[0xB0:0xC0] = [_unpack_structure] * 0x10
+    _handlers[0xC0] = _unpack_null
+    _handlers[0xC1] = _unpack_fixed
+    _handlers[0xC2] = _unpack_false
+    _handlers[0xC3] = _unpack_true
+    _handlers[0xC8:0xCC] = [_unpack_fixed] * 4
+    _handlers[0xCC:0xCF] = [_unpack_bytes] * 3
+    _handlers[0xD0:0xD3] = [_unpack_string] * 3
+    _handlers[0xD4:0xD7] = [_unpack_list] * 3
+    _handlers[0xD7] = _unpack_list_stream
+    _handlers[0xD8:0xDB] = [_unpack_sized_map] * 3
+    _handlers[0xDB] = _unpack_map_stream
+    _handlers[0xDF] = _unpack_end_of_stream
+    _handlers[0xF0:0x100] = [_unpack_negative_tiny_int] * 0x10
 
     def unpack_map(self):
         marker = self.read_u8()
         return self._unpack_map(marker)
 
     def _unpack_map(self, marker):
-        marker_high = marker & 0xF0
-        if marker_high == 0xA0:
-            size = marker & 0x0F
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xD8:  # MAP_8:
-            size, = struct_unpack(">B", self.read(1))
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xD9:  # MAP_16:
-            size, = struct_unpack(">H", self.read(2))
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xDA:  # MAP_32:
-            size, = struct_unpack(">I", self.read(4))
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xDB:  # MAP_STREAM:
-            value = {}
-            key = None
-            while key is not EndOfStream:
-                key = self._unpack()
-                if key is not EndOfStream:
-                    value[key] = self._unpack()
-            return value
+        if 0xA0 <= marker <= 0xAF or 0xD8 <= marker <= 0xDB:
+            return self._handlers[marker](self, marker)
         else:
             return None
 
@@ -548,7 +434,9 @@ class Unpacker:
     def _unpack_structure_header(self, marker):
         marker_high = marker & 0xF0
         if marker_high == 0xB0:  # TINY_STRUCT
-            signature = self.read(1).tobytes()
+            buffer = self.unpackable
+            signature = PACKED_UINT_8[buffer.data[buffer.p]]
+            buffer.p += 1
             return marker & 0x0F, signature
         else:
             raise ValueError("Expected structure, found marker %02X" % marker)
@@ -562,6 +450,10 @@ class UnpackableBuffer:
         if data is None:
             self.data = bytearray(self.initial_capacity)
             self.used = 0
+        elif isinstance(data, memoryview):
+            # Unpack in place, without copying
+            self.data = data
+            self.used = len(data)
         else:
             self.data = bytearray(data)
             self.used = len(self.data)
@@ -614,27 +506,87 @@ class PackStream:
     messaging.
     """
 
-    def __init__(self, wire):
+    def __init__(self, wire, max_chunk_size=MAX_CHUNK_SIZE):
+        if not 1 <= max_chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError("Chunk size must be between 1 and %d" % MAX_CHUNK_SIZE)
         self.wire = wire
+        self.max_chunk_size = max_chunk_size
+
+    @classmethod
+    def encode_message(cls, message, max_chunk_size=MAX_CHUNK_SIZE):
+        """ Pack a message and split it into chunks of at most
+        `max_chunk_size` bytes, followed by the end-of-message marker.
+
+        :param message:
+        :param max_chunk_size:
+        :return: the chunked message as bytes
+        """
+        if not isinstance(message, Structure):
+            raise TypeError("Message must be a Structure instance")
+        # Pack behind room for the header of a single chunk
+        data = bytearray(2)
+        Packer(data).pack(message)
+        size = len(data) - 2
+        if size <= max_chunk_size:
+            data[0:2] = PACKED_UINT_16[size]
+            data += b"\x00\x00"
+            return bytes(data)
+        return cls.chunk_message(memoryview(data)[2:], max_chunk_size)
+
+    @classmethod
+    def chunk_message(cls, data, max_chunk_size=MAX_CHUNK_SIZE):
+        """ Split packed message data into chunks of at most
+        `max_chunk_size` bytes, followed by the end-of-message marker.
+
+        :param data:
+        :param max_chunk_size:
+        :return: the chunked message as bytes
+        """
+        size = len(data)
+        chunked = bytearray()
+        for start in range(0, size, max_chunk_size):
+            chunk = data[start:start + max_chunk_size]
+            chunked += PACKED_UINT_16[len(chunk)]
+            chunked += chunk
+        chunked += b"\x00\x00"
+        return bytes(chunked)
 
     def read_message(self):
         """ Read a chunked message.
 
+        The message is unpacked straight from the receive buffer of the
+        wire. Where it spans several chunks, the chunk data is first moved
+        together in place, over the chunk headers.
+
         :return:
         """
-        data = []
-        more = True
-        while more:
-            chunk_header = self.wire.read(2)
-            chunk_size, = struct_unpack(">H", chunk_header)
-            if chunk_size:
-                chunk_data = self.wire.read(chunk_size)
-                data.append(chunk_data)
+        wire = self.wire
+        chunks = []
+        end = 0
+        while True:
+            with wire.peek(end + 2) as header:
+                chunk_size = header[end] << 8 | header[end + 1]
+            end += 2
+            if not chunk_size:
+                break
+            chunks.append((end, chunk_size))
+            end += chunk_size
+        with wire.peek(end) as view:
+            if chunks:
+                start = p = chunks[0][0]
+                for offset, chunk_size in chunks:
+                    if offset != p:
+                        view[p:p + chunk_size] = view[offset:offset + chunk_size]
+                    p += chunk_size
+                data = view[start:p]
             else:
-                more = False
-        buffer = UnpackableBuffer(b"".join(data))
-        unpacker = Unpacker(buffer)
-        return unpacker.unpack()
+                data = view[0:0]
+            try:
+                message = Unpacker(UnpackableBuffer(data)).unpack()
+            finally:
+                data.release()
+        wire.skip(end)
+        return message
 
     def write_message(self, message):
         """ Write a chunked message.
@@ -642,15 +594,7 @@ class PackStream:
         :param message:
         :return:
         """
-        if not isinstance(message, Structure):
-            raise TypeError("Message must be a Structure instance")
-        b = BytesIO()
-        packer = Packer(b)
-        packer.pack(message)
-        data = b.getvalue()
-        # TODO: multi-chunk messages
-        header = bytearray(divmod(len(data), 0x100))
-        self.wire.write(header + data + b"\x00\x00")
+        self.wire.write(self.encode_message(message, self.max_chunk_size))
 
     def drain(self):
         """ Flush the writer.
@@ -665,3 +609,29 @@ class PackStream:
         :return:
         """
         self.wire.close()
+
+
+class AsyncPackStream(PackStream):
+    """ Chunked message reader/writer for PackStream messaging over an
+    :class:`.AsyncWire`. Writing is shared with :class:`.PackStream`, as
+    output is only buffered; reading is awaited.
+    """
+
+    async def read_message(self):
+        """ Read a chunked message.
+
+        :return:
+        """
+        data = []
+        more = True
+        while more:
+            chunk_header = await self.wire.read(2)
+            chunk_size, = struct_unpack(">H", chunk_header)
+            if chunk_size:
+                chunk_data = await self.wire.read(chunk_size)
+                data.append(chunk_data)
+            else:
+                more = False
+        buffer = UnpackableBuffer(b"".join(data))
+        unpacker = Unpacker(buffer)
+        return unpacker.unpack()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) 2002-2020 "Neo4j,"
+# Neo4j Sweden AB [http://neo4j.com]
+#
+# This file is part of Neo4j.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Minimal Bolt client for checking that Neo4j servers are ready for tests,
+which takes more than an open port: the server must accept a Bolt
+handshake and HELLO, and the members of a cluster must agree on a routing
+table with a writer, readers and all of them as routers.
+
+    python -m boltstub.probe -u neo4j -p pass core0:7687 core1:7687 core2:7687
+
+exits with 0 once ready, or 1 on timeout.
+"""
+
+from argparse import ArgumentParser
+from logging import getLogger
+from random import uniform
+from sys import exit
+from time import monotonic, sleep
+
+from boltstub.packstream import PackStream, Structure
+from boltstub.wiring import Address, Wire
+
+log = getLogger(__name__)
+
+# Versions offered in the handshake, most preferred first
+VERSIONS = [(4, 2), (4, 1), (4, 0), (3, 0)]
+
+HELLO = b"\x01"
+GOODBYE = b"\x02"
+RUN = b"\x10"
+PULL = b"\x3F"
+SUCCESS = b"\x70"
+RECORD = b"\x71"
+FAILURE = b"\x7F"
+
+
+class ProbeError(Exception):
+    """ Raised when a server is reachable but not ready.
+    """
+
+
+class Probe:
+    """ Bolt connection to a single server.
+    """
+
+    def __init__(self, address, user, password, timeout=5):
+        self.address = address
+        self.wire = Wire.open(Address.parse(address), timeout=timeout)
+        try:
+            self.wire.settimeout(timeout)
+            self.stream = PackStream(self.wire)
+            self.version = self._handshake()
+            self._send(Structure(HELLO, {"user_agent": "testkit-probe/1.0",
+                                         "scheme": "basic",
+                                         "principal": user,
+                                         "credentials": password}))
+            self._receive()
+        except Exception:
+            self.wire.close()
+            raise
+
+    def _handshake(self):
+        data = bytearray(b"\x60\x60\xB0\x17")
+        for major, minor in VERSIONS:
+            data += bytes([0, 0, minor, major])
+        self.wire.write(data)
+        self.wire.send()
+        response = self.wire.read(4)
+        version = (response[3], response[2])
+        if version == (0, 0):
+            raise ProbeError("%s supports none of the Bolt versions offered" % self.address)
+        return version
+
+    def _send(self, *messages):
+        for message in messages:
+            self.stream.write_message(message)
+        self.stream.drain()
+
+    def _receive(self):
+        """ Records up to the summary of the next request, raising any
+        failure.
+        """
+        records = []
+        while True:
+            message = self.stream.read_message()
+            if message.tag == RECORD:
+                records.append(message.fields[0])
+            elif message.tag == SUCCESS:
+                return records
+            elif message.tag == FAILURE:
+                raise ProbeError("%s: %s" % (self.address, message.fields[0].get("message")))
+
+    def run(self, cypher, parameters=None, db=None):
+        """ Records of a query, pulled all at once.
+        """
+        extra = {"db": db} if db else {}
+        if self.version >= (4, 0):
+            pull = Structure(PULL, {"n": -1})
+        else:
+            pull = Structure(PULL)
+        self._send(Structure(RUN, cypher, parameters or {}, extra), pull)
+        self._receive()
+        return self._receive()
+
+    def routing_table(self):
+        """ Addresses of the members by role, as in the routing table the
+        server hands out to drivers.
+        """
+        if self.version >= (4, 0):
+            records = self.run("CALL dbms.routing.getRoutingTable($context, $database)",
+                               {"context": {"address": self.address}, "database": None},
+                               db="system")
+        else:
+            records = self.run("CALL dbms.cluster.routing.getRoutingTable($context)",
+                               {"context": {}})
+        roles = {"ROUTE": [], "READ": [], "WRITE": []}
+        for _, servers in records:
+            for server in servers:
+                roles.setdefault(server["role"], []).extend(server["addresses"])
+        return roles
+
+    def close(self):
+        try:
+            self._send(Structure(GOODBYE))
+        finally:
+            self.wire.close()
+
+
+def server_ready(address, user, password):
+    """ Whether the server accepts a handshake and HELLO.
+    """
+    try:
+        Probe(address, user, password).close()
+    except (OSError, ProbeError) as e:
+        log.debug("%s is not ready: %s", address, e)
+        return False
+    return True
+
+
+def cluster_ready(addresses, user, password):
+    """ Whether all members hand out a routing table with a writer, a
+    reader and all members as routers.
+    """
+    for address in addresses:
+        try:
+            probe = Probe(address, user, password)
+            try:
+                roles = probe.routing_table()
+            finally:
+                probe.close()
+        except (OSError, ProbeError) as e:
+            log.debug("%s is not ready: %s", address, e)
+            return False
+        if not roles["WRITE"] or not roles["READ"] or len(roles["ROUTE"]) < len(addresses):
+            log.debug("%s is not ready, roles are %s", address, roles)
+            return False
+    return True
+
+
+def wait_until_ready(addresses, user, password, timeout=300, initial_delay=0.1, max_delay=5):
+    """ Waits for the servers to be ready, as a cluster when more than one
+    address is given. Returns whether they got ready before the timeout.
+
+    The delay between checks doubles from the initial delay up to the
+    maximum, each one shortened by up to half at random so that several
+    waiting clients do not check in step.
+    """
+    deadline = monotonic() + timeout
+    delay = initial_delay
+    while True:
+        if len(addresses) > 1:
+            ready = cluster_ready(addresses, user, password)
+        else:
+            ready = server_ready(addresses[0], user, password)
+        if ready:
+            return True
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return False
+        sleep(min(delay / 2 + uniform(0, delay / 2), remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def main():
+    parser = ArgumentParser(description="Waits for Neo4j servers to be ready for tests, "
+                                        "as a cluster when more than one address is given.")
+    parser.add_argument("-u", "--user", default="neo4j")
+    parser.add_argument("-p", "--password", default="pass")
+    parser.add_argument("-t", "--timeout", type=float, default=300,
+                        help="Number of seconds to wait for at most.")
+    parser.add_argument("addresses", nargs="+", help="Addresses of the servers, as host:port.")
+    parsed = parser.parse_args()
+    if not wait_until_ready(parsed.addresses, parsed.user, parsed.password, parsed.timeout):
+        print("ERROR: Timeout while waiting for %s to be ready" % ", ".join(parsed.addresses))
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
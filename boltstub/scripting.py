@@ -19,11 +19,34 @@
 # limitations under the License.
 
 
-from asyncio import sleep, IncompleteReadError
+from asyncio import sleep as async_sleep, IncompleteReadError
+from hashlib import sha256
 from json import JSONDecoder
+from os import environ, makedirs, path, replace, stat, unlink
+from pickle import HIGHEST_PROTOCOL, dump as pickle_dump, load as pickle_load
+from re import compile as re_compile
+from tempfile import gettempdir, NamedTemporaryFile
 from textwrap import wrap
+from time import sleep
 
-from boltstub.packstream import Structure
+from boltstub.packstream import MAX_CHUNK_SIZE, Packer, PackStream, Structure
+
+
+# Bump whenever the layout of parsed scripts changes, to invalidate the cache
+CACHE_VERSION = b"1"
+
+try:
+    from os import getuid
+except ImportError:
+    # Windows, where the temporary directory is per user already
+    getuid = None
+
+# Directory of cached parsed scripts, set BOLTSTUB_CACHE_DIR empty to disable.
+# The cache is unpickled, so the directory is private to the user.
+CACHE_DIR = environ.get("BOLTSTUB_CACHE_DIR", path.join(
+    gettempdir(), "boltstub-cache" if getuid is None else "boltstub-cache-%d" % getuid()))
+
+decoder = JSONDecoder()
 
 
 def splart(s):
@@ -33,6 +56,37 @@ def splart(s):
     return parts
 
 
+class RepeatIndex:
+    """ Placeholder for the index of each repetition in the fields of a
+    <REPEAT> line, written as $i in scripts.
+    """
+
+    def __repr__(self):
+        return "$i"
+
+    def __reduce__(self):
+        # Unpickle as the same instance
+        return "REPEAT_INDEX"
+
+
+REPEAT_INDEX = RepeatIndex()
+
+# Bare $i tokens, skipping over JSON strings
+REPEAT_INDEX_PATTERN = re_compile(r'"(?:\\.|[^"\\])*"|\$i\b')
+REPEAT_INDEX_JSON = '"\\u0000$i"'
+
+
+def mark_repeat_index(value):
+    if value == "\x00$i":
+        return REPEAT_INDEX
+    elif isinstance(value, list):
+        return [mark_repeat_index(item) for item in value]
+    elif isinstance(value, dict):
+        return {key: mark_repeat_index(item) for key, item in value.items()}
+    else:
+        return value
+
+
 class BoltScript:
 
     protocol_version = ()
@@ -42,7 +96,18 @@ class BoltScript:
         "S": {},
     }
 
-    def __new__(cls, *lines, auto=None, filename=None, handshake_data=None,
+    tags = {
+        "C": {},
+        "S": {},
+    }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Reverse lookup of message tags by name, for each role
+        cls.tags = {role: {name: tag for tag, name in messages.items()}
+                    for role, messages in cls.messages.items()}
+
+    def __new__(cls, *lines, auto=None, chunk_size=None, filename=None, handshake_data=None,
                 port=None, version=None):
         if version is None or version in {(1,), (3, 0), (3, 1), (3, 2), (3, 3)}:
             return super().__new__(Bolt1Script)
@@ -57,22 +122,30 @@ class BoltScript:
         else:
             raise BoltScriptError("Unsupported version {}".format(version))
 
-    def __init__(self, *lines, auto=None, filename=None, handshake_data=None,
+    def __init__(self, *lines, auto=None, chunk_size=None, filename=None, handshake_data=None,
                  port=None, **_):
+        self._auto = list(auto or [])
+        self.chunk_size = chunk_size or MAX_CHUNK_SIZE
+        if not 1 <= self.chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError("Chunk size must be between 1 and %d" % MAX_CHUNK_SIZE)
         self._lines = []
         for line in lines:
             self.append(line)
-        self._auto = list(auto or [])
         self.filename = filename or ""
         self.handshake_data = handshake_data
         self.port = port or 0
 
+    def __reduce__(self):
+        # Bypass the version lookup in __new__ when unpickling
+        return object.__new__, (type(self),), self.__dict__
+
     def __iter__(self):
         for line in self._lines:
             yield line
 
     def append(self, line):
         line.script = self
+        line.prepare()
         self._lines.append(line)
 
     def auto_match(self, tag):
@@ -93,10 +166,9 @@ class BoltScript:
 
     @classmethod
     def tag(cls, role, name):
-        tags = [k for k, v in cls.messages[role].items() if v == name]
-        if tags:
-            return tags[0]
-        else:
+        try:
+            return cls.tags[role][name]
+        except KeyError:
             raise ValueError("Message %r not available for protocol "
                              "version %s" % (name, ".".join(map(str, cls.protocol_version))))
 
@@ -113,14 +185,56 @@ class BoltScript:
 
     @classmethod
     def load(cls, filename):
-        with open(filename) as fin:
-            def iter_lines():
-                for line in fin:
-                    yield line
+        with open(filename, "rb") as fin:
+            source = fin.read()
+        cache_file = None
+        if cls._cache_dir():
+            key = sha256(CACHE_VERSION + b"\n" + source).hexdigest()
+            cache_file = path.join(CACHE_DIR, key + ".pickle")
+            try:
+                with open(cache_file, "rb") as fin:
+                    script = pickle_load(fin)
+            except Exception:
+                pass
+            else:
+                script.filename = filename
+                return script
+        script = cls.parse(source.decode("utf-8"))
+        if cache_file:
+            cls._store(script, cache_file)
+        script.filename = filename
+        return script
+
+    @staticmethod
+    def _cache_dir():
+        """ The cache directory, created if missing, or None when disabled or
+        when other users could write to it.
+        """
+        if not CACHE_DIR:
+            return None
+        try:
+            makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+            status = stat(CACHE_DIR)
+        except OSError:
+            return None
+        if getuid is not None and (status.st_uid != getuid() or status.st_mode & 0o022):
+            return None
+        return CACHE_DIR
 
-            script = cls.parse_lines(iter_lines())
-            script.filename = filename
-            return script
+    @classmethod
+    def _store(cls, script, cache_file):
+        # Write to a temporary file first, so that concurrent loads
+        # only ever see complete entries
+        try:
+            fout = NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False)
+        except OSError:
+            return
+        try:
+            with fout:
+                pickle_dump(script, fout, HIGHEST_PROTOCOL)
+            replace(fout.name, cache_file)
+        except Exception:
+            unlink(fout.name)
 
     @classmethod
     def parse_lines(cls, lines):
@@ -147,6 +261,8 @@ class BoltScript:
                     metadata["handshake_data"] = data
                 elif tag == "PORT":
                     metadata["port"] = fields[0]
+                elif tag == "CHUNK_SIZE":
+                    metadata["chunk_size"] = int(fields[0])
                 else:
                     raise ValueError("Unknown meta tag {!r}".format(tag))
                 pass
@@ -168,6 +284,15 @@ class BoltScript:
                     elif tag == "<NOOP>":
                         out.append(ServerNoOpLine())
                         out[-1].line_no = line_no
+                    elif tag.startswith("<REPEAT "):
+                        count = int(tag[8:-1])
+                        _, repeated_tag, repeated_fields = cls.parse_line(
+                            REPEAT_INDEX_PATTERN.sub(
+                                lambda m: REPEAT_INDEX_JSON if m.group() == "$i" else m.group(),
+                                " ".join(map(str, fields))))
+                        out.append(ServerRepeatLine(count, repeated_tag,
+                                                    *map(mark_repeat_index, repeated_fields)))
+                        out[-1].line_no = line_no
                     else:
                         raise ValueError("Unknown command %r" % (tag,))
                 else:
@@ -185,7 +310,10 @@ class BoltScript:
         if tag.endswith(":"):
             role = tag.rstrip(":")
             tag, data = splart(data)
-        decoder = JSONDecoder()
+        if tag.startswith("<") and not tag.endswith(">"):
+            # Command with arguments, such as <REPEAT 10>
+            arguments, _, data = data.partition(">")
+            tag = "%s %s>" % (tag, arguments.strip())
         while data:
             data = data.lstrip()
             try:
@@ -383,9 +511,19 @@ class Line:
 
     line_no = None
 
+    def prepare(self):
+        """ Called once the line has been added to a script, which is
+        immutable from then on.
+        """
+
     def action(self, actor):
         pass
 
+    async def async_action(self, actor):
+        # Lines that only write are shared with the blocking actor, the
+        # asyncio actor drains the output after each line.
+        self.action(actor)
+
     @classmethod
     def is_compatible(cls, protocol_version):
         return True
@@ -413,38 +551,73 @@ class ClientMessageLine(ClientLine):
     def action(self, actor):
         self.default_action(actor, self)
 
+    async def async_action(self, actor):
+        await self.async_default_action(actor, self)
+
     @classmethod
     def default_action(cls, actor, line=None):
         # TODO: improve the flow of logic here
-        script = actor.script
         request = None
-        c_msg = None
         while not actor.wire.closed and not actor.wire.broken:
             try:
                 request = actor.stream.read_message()
             except IncompleteReadError as error:
-                if not line and error.expected == 2 and error.partial == b"":
-                    # Likely failed reading a new chunk header, and we're not
-                    # waiting for anything specific anyway, so just exit quietly.
+                if cls._is_quiet_end(error, line):
                     return
-                else:
-                    raise
-            tag = script.tag_name("C", request.tag)
-            c_msg = ClientMessageLine(tag, *request.fields)
-            c_msg.script = script
-            if script.auto_match(request.tag):
-                # Auto-matched
-                actor.log("(AUTO) %s", c_msg)
-                for response in script.on_auto_match(request):
-                    tag = script.tag_name("S", response.tag)
-                    s_msg = ServerMessageLine(tag, *response.fields)
-                    s_msg.script = script
-                    actor.log("(AUTO) %s", s_msg)
-                    actor.stream.write_message(response)
-                actor.stream.drain()
-            else:
+                raise
+            if not cls._auto_respond(actor, request):
+                break
+        cls._match(actor, line, request)
+
+    @classmethod
+    async def async_default_action(cls, actor, line=None):
+        request = None
+        while not actor.wire.closed and not actor.wire.broken:
+            try:
+                request = await actor.stream.read_message()
+            except IncompleteReadError as error:
+                if cls._is_quiet_end(error, line):
+                    return
+                raise
+            if not cls._auto_respond(actor, request):
                 break
-        if line and line.match(request):
+            await actor.wire.drain()
+        cls._match(actor, line, request)
+
+    @classmethod
+    def _is_quiet_end(cls, error, line):
+        # Likely failed reading a new chunk header, and we're not
+        # waiting for anything specific anyway, so just exit quietly.
+        return not line and error.expected == 2 and error.partial == b""
+
+    @classmethod
+    def _auto_respond(cls, actor, request):
+        """ Respond to an auto-matched request, returning False if the
+        request is not auto-matched and should be matched against the
+        script instead.
+        """
+        script = actor.script
+        if not script.auto_match(request.tag):
+            return False
+        c_msg = ClientMessageLine(script.tag_name("C", request.tag), *request.fields)
+        c_msg.script = script
+        actor.log("(AUTO) %s", c_msg)
+        for response in script.on_auto_match(request):
+            tag = script.tag_name("S", response.tag)
+            s_msg = ServerMessageLine(tag, *response.fields)
+            s_msg.script = script
+            actor.log("(AUTO) %s", s_msg)
+            actor.stream.write_message(response)
+        actor.stream.drain()
+        return True
+
+    @classmethod
+    def _match(cls, actor, line, request):
+        c_msg = None
+        if request is not None:
+            c_msg = ClientMessageLine(actor.script.tag_name("C", request.tag), *request.fields)
+            c_msg.script = actor.script
+        if line and request is not None and line.match(request):
             actor.log("%s", c_msg)
         else:
             actor.log("%s", c_msg)
@@ -485,6 +658,8 @@ class ClientMessageLine(ClientLine):
 
 class ServerMessageLine(ServerLine):
 
+    data = None
+
     def __init__(self, tag_name, *fields):
         self.tag_name = tag_name
         self.fields = fields
@@ -492,11 +667,106 @@ class ServerMessageLine(ServerLine):
     def __str__(self):
         return "S: %s %s" % (self.tag_name, " ".join(map(repr, self.fields)))
 
+    def prepare(self):
+        # Encode once, playback writes the chunked bytes as they are
+        tag = self.script.tag("S", self.tag_name)
+        self.data = PackStream.encode_message(Structure(tag, *self.fields),
+                                              self.script.chunk_size)
+
     def action(self, actor):
         actor.log("%s", self)
+        actor.wire.write(self.data)
+        actor.wire.send()
+
+
+class ServerRepeatLine(ServerLine):
+    """ Server message repeated a number of times, generated lazily during
+    playback. Any $i fields are replaced by the index of each repetition,
+    counting from zero.
+    """
+
+    # Send the output every so many bytes while repeating
+    flush_size = 0x10000
+
+    data = None
+
+    segments = None
+
+    def __init__(self, count, tag_name, *fields):
+        self.count = count
+        self.tag_name = tag_name
+        self.fields = fields
+
+    def __str__(self):
+        return "S: <REPEAT %d> %s %s" % (self.count, self.tag_name,
+                                         " ".join(map(repr, self.fields)))
+
+    def prepare(self):
         tag = self.script.tag("S", self.tag_name)
-        actor.stream.write_message(Structure(tag, *self.fields))
-        actor.stream.drain()
+        packer = RepeatTemplatePacker()
+        packer.pack(Structure(tag, *self.fields))
+        if packer.segments:
+            # Packed data either side of each $i
+            self.segments = packer.segments + [bytes(packer.data)]
+        else:
+            self.data = PackStream.chunk_message(packer.data, self.script.chunk_size)
+
+    def messages(self):
+        """ Generate the chunked bytes of each repetition.
+        """
+        if self.segments is None:
+            for _ in range(self.count):
+                yield self.data
+        else:
+            first, rest = self.segments[0], self.segments[1:]
+            chunk_size = self.script.chunk_size
+            for i in range(self.count):
+                packer = Packer(bytearray(first))
+                for segment in rest:
+                    packer.pack(i)
+                    packer.pack_raw(segment)
+                yield PackStream.chunk_message(packer.data, chunk_size)
+
+    def action(self, actor):
+        actor.log("%s", self)
+        wire = actor.wire
+        pending = 0
+        for data in self.messages():
+            wire.write(data)
+            pending += len(data)
+            if pending >= self.flush_size:
+                wire.send()
+                pending = 0
+        wire.send()
+
+    async def async_action(self, actor):
+        actor.log("%s", self)
+        wire = actor.wire
+        pending = 0
+        for data in self.messages():
+            wire.write(data)
+            pending += len(data)
+            if pending >= self.flush_size:
+                wire.send()
+                await wire.drain()
+                pending = 0
+        wire.send()
+
+
+class RepeatTemplatePacker(Packer):
+    """ Packer splitting its output at each occurrence of $i.
+    """
+
+    def __init__(self):
+        super(RepeatTemplatePacker, self).__init__()
+        self.segments = []
+
+    def _pack(self, value):
+        if value is REPEAT_INDEX:
+            self.segments.append(bytes(self.data))
+            self.data.clear()
+        else:
+            super(RepeatTemplatePacker, self)._pack(value)
 
 
 class ServerRawBytesLine(ServerLine):
@@ -525,6 +795,10 @@ class ServerSleepLine(ServerLine):
         actor.log("%s", self)
         sleep(self.delay)
 
+    async def async_action(self, actor):
+        actor.log("%s", self)
+        await async_sleep(self.delay)
+
 
 class ServerNoOpLine(ServerLine):
 
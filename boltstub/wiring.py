@@ -19,8 +19,9 @@
 """
 Low-level module for network communication.
 
-This module provides a convenience socket wrapper class (:class:`.Wire`)
-as well as classes for modelling IP addresses, based on tuples.
+This module provides a convenience socket wrapper class (:class:`.Wire`),
+its asyncio counterpart (:class:`.AsyncWire`), as well as classes for
+modelling IP addresses, based on tuples.
 """
 
 
@@ -151,10 +152,18 @@ class Wire(object):
         s.connect(address)
         return cls(s)
 
+    #: Initial size of the receive buffer, which grows as required
+    initial_input_capacity = 65536
+
     def __init__(self, s):
         s.settimeout(None)  # ensure wrapped socket is in blocking mode
         self.__socket = s
-        self.__input = bytearray()
+        # Received bytes are kept in a single buffer between a read cursor
+        # and an end marker, unread bytes are only moved to the front when
+        # the space behind them runs out.
+        self.__input = bytearray(self.initial_input_capacity)
+        self.__input_start = 0
+        self.__input_end = 0
         self.__output = bytearray()
 
     def secure(self, verify=True, hostname=None):
@@ -174,28 +183,68 @@ class Wire(object):
             # TODO: add connection failure/diagnostic callback
             raise WireError("Unable to establish secure connection with remote peer")
 
+    def settimeout(self, timeout):
+        """ Set the number of seconds that network operations may block
+        for, or None to block for as long as it takes.
+        """
+        self.__socket.settimeout(timeout)
+
+    def __fill(self, n):
+        """ Receive from the network until at least `n` unread bytes are
+        held in the input buffer.
+        """
+        available = self.__input_end - self.__input_start
+        if available >= n:
+            return
+        if self.__input_start + n > len(self.__input):
+            # Compact, then grow if there is still not enough room
+            if available:
+                self.__input[:available] = self.__input[self.__input_start:self.__input_end]
+            self.__input_start = 0
+            self.__input_end = available
+            if n > len(self.__input):
+                self.__input += bytearray(max(n, 2 * len(self.__input)) - len(self.__input))
+        view = memoryview(self.__input)
+        try:
+            while self.__input_end - self.__input_start < n:
+                try:
+                    received = self.__socket.recv_into(view[self.__input_end:])
+                except (IOError, OSError):
+                    self.__broken = True
+                    raise BrokenWireError("Broken")
+                else:
+                    if received:
+                        self.__input_end += received
+                    else:
+                        self.__broken = True
+                        raise BrokenWireError("Network read incomplete "
+                                              "(received %d of %d bytes)" %
+                                              (self.__input_end - self.__input_start, n))
+        finally:
+            view.release()
+
     def read(self, n):
         """ Read bytes from the network.
         """
-        while len(self.__input) < n:
-            required = n - len(self.__input)
-            requested = max(required, 8192)
-            try:
-                received = self.__socket.recv(requested)
-            except (IOError, OSError):
-                self.__broken = True
-                raise BrokenWireError("Broken")
-            else:
-                if received:
-                    self.__input.extend(received)
-                else:
-                    self.__broken = True
-                    raise BrokenWireError("Network read incomplete "
-                                          "(received %d of %d bytes)" %
-                                          (len(self.__input), n))
-        data = self.__input[:n]
-        self.__input[:n] = []
-        return data
+        self.__fill(n)
+        start = self.__input_start
+        self.__input_start += n
+        return self.__input[start:start + n]
+
+    def peek(self, n):
+        """ Return a writable view of the next `n` bytes from the network,
+        without consuming them. The view must be released before any further
+        reading takes place.
+        """
+        self.__fill(n)
+        return memoryview(self.__input)[self.__input_start:self.__input_start + n]
+
+    def skip(self, n):
+        """ Consume `n` bytes previously made available by :meth:`.peek`.
+        """
+        self.__input_start += n
+        if self.__input_start == self.__input_end:
+            self.__input_start = self.__input_end = 0
 
     def write(self, b):
         """ Write bytes to the output buffer.
@@ -207,16 +256,14 @@ class Wire(object):
         """
         if self.__closed:
             raise WireError("Closed")
-        sent = 0
-        while self.__output:
+        sent = len(self.__output)
+        if sent:
             try:
-                n = self.__socket.send(self.__output)
+                self.__socket.sendall(self.__output)
             except (IOError, OSError):
                 self.__broken = True
                 raise BrokenWireError("Broken")
-            else:
-                self.__output[:n] = []
-                sent += n
+            self.__output.clear()
         return sent
 
     def close(self):
@@ -256,6 +303,95 @@ class Wire(object):
         return Address(self.__socket.getpeername())
 
 
+class AsyncWire(object):
+    """ Buffered asyncio stream wrapper for reading and writing bytes.
+
+    Reads are awaited; writes are buffered and handed to the transport on
+    :meth:`.send`, with :meth:`.drain` applying flow control.
+    """
+
+    __closed = False
+
+    __broken = False
+
+    def __init__(self, reader, writer):
+        self.__reader = reader
+        self.__writer = writer
+        self.__output = bytearray()
+
+    async def read(self, n):
+        """ Read bytes from the network.
+
+        :raise IncompleteReadError: if the stream ends before `n` bytes
+            have been read
+        """
+        try:
+            return await self.__reader.readexactly(n)
+        except (IOError, OSError):
+            self.__broken = True
+            raise BrokenWireError("Broken")
+
+    def write(self, b):
+        """ Write bytes to the output buffer.
+        """
+        self.__output.extend(b)
+
+    def send(self):
+        """ Pass the contents of the output buffer to the transport.
+        """
+        if self.__closed:
+            raise WireError("Closed")
+        sent = len(self.__output)
+        if sent:
+            self.__writer.write(bytes(self.__output))
+            self.__output.clear()
+        return sent
+
+    async def drain(self):
+        """ Wait until the transport has sent enough of its buffered data.
+        """
+        try:
+            await self.__writer.drain()
+        except (IOError, OSError):
+            self.__broken = True
+            raise BrokenWireError("Broken")
+
+    def close(self):
+        """ Close the connection.
+        """
+        try:
+            self.__writer.close()
+        except (IOError, OSError):
+            self.__broken = True
+            raise BrokenWireError("Broken")
+        else:
+            self.__closed = True
+
+    @property
+    def closed(self):
+        """ Flag indicating whether this connection has been closed locally.
+        """
+        return self.__closed
+
+    @property
+    def broken(self):
+        """ Flag indicating whether this connection has been closed remotely.
+        """
+        return self.__broken
+
+    @property
+    def local_address(self):
+        """ The local :class:`.Address` to which this connection is bound.
+        """
+        return Address(self.__writer.get_extra_info("sockname"))
+
+    @property
+    def remote_address(self):
+        """ The remote :class:`.Address` to which this connection is bound.
+        """
+        return Address(self.__writer.get_extra_info("peername"))
+
+
 class WireError(OSError):
     """ Raised when a connection error occurs.
     """
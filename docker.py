@@ -13,12 +13,19 @@ class Container:
         for k in envMap:
             cmd.extend(["-e", "%s=%s" % (k, envMap[k])])
 
-    def exec(self, command, workdir=None, envMap={}):
+    def exec(self, command, workdir=None, envMap={}, log=None):
+        """ Runs the command in the container, with the output written to
+        the log file if given.
+        """
         cmd = ["docker", "exec"]
         self._add(cmd, workdir, envMap)
         cmd.append(self.name)
         cmd.extend(command)
-        subprocess.run(cmd, check=True)
+        if log:
+            log.flush()
+            subprocess.run(cmd, check=True, stdout=log, stderr=subprocess.STDOUT)
+        else:
+            subprocess.run(cmd, check=True)
 
     def exec_detached(self, command, workdir=None, envMap={}):
         cmd = ["docker", "exec", "--detach"]
@@ -63,6 +70,14 @@ def run(image, name, command=None, mountMap={}, hostMap={}, portMap={},
     return container
 
 
+def pull(image):
+    """ Pulls the image ahead of running it, failing silently since running
+    pulls it anyway.
+    """
+    subprocess.run(["docker", "pull", "--quiet", image], check=False,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
 def load(readable):
     cmd = ["docker", "load"]
     p = subprocess.Popen(cmd, stdin=subprocess.PIPE)
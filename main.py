@@ -5,11 +5,14 @@ setups, it is the responsibility of this script to setup these contexts and
 orchestrate which suites that are executed in each context.
 """
 
+import io
 import os
 import sys
 import atexit
 import subprocess
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tests.testenv import (
         begin_test_suite, end_test_suite, in_teamcity)
 import docker
@@ -116,6 +119,135 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
         "docker", "network", "create", "the-bridge"
     ])
 
+    # Make an artifacts folder where the database can place it's logs, each
+    # time we start a database server we should use a different folder.
+    neo4jArtifactsPath = os.path.join(artifactsPath, "neo4j")
+    os.makedirs(neo4jArtifactsPath)
+
+    # Neo4j servers to run the tests against, the first ones are started
+    # right away so that they boot while the other suites run.
+    neo4jServers = [
+        {
+            "name": "4.2-cluster",
+            "image": "neo4j:4.2-enterprise",
+            "version": "4.2",
+            "edition": "enterprise",
+            "cluster": True,
+            "suite": "",  # TODO: Define cluster suite
+            "scheme": "neo4j"
+        },
+        {
+            "name": "3.5-enterprise",
+            "image": "neo4j:3.5-enterprise",
+            "version": "3.5",
+            "edition": "enterprise",
+            "cluster": False,
+            "suite": "3.5",
+            "scheme": "bolt"
+        },
+        {
+            "name": "4.0-community",
+            "image": "neo4j:4.0",
+            "version": "4.0",
+            "edition": "community",
+            "cluster": False,
+            "suite": "4.0",
+            "scheme": "neo4j"
+        },
+        {
+            "name": "4.1-enterprise",
+            "image": "neo4j:4.1-enterprise",
+            "version": "4.1",
+            "edition": "enterprise",
+            "cluster": False,
+            "suite": "4.1",
+            "scheme": "neo4j"
+        },
+    ]
+    if in_teamcity:
+        # Use last successful build of 4.2.0. Need to update this when a new
+        # patch is in the baking.  When there is an official 4.2 build there
+        # should be a Docker hub based image above (or added when not in
+        # Teamcity).
+        s = {
+            "name": "4.2-tc-enterprise",
+            "image": "neo4j:4.2.3-enterprise",
+            "version": "4.2",
+            "edition": "enterprise",
+            "cluster": False,
+            "suite": "4.2",
+            "scheme": "neo4j",
+            "download": teamcity.DockerImage(
+                "neo4j-enterprise-4.2.3-docker-loadable.tar")
+        }
+        neo4jServers.append(s)
+
+    def start_neo4j_server(neo4jServer, log=None):
+        """ Starts the Neo4j server without waiting for it to be ready.
+        """
+        download = neo4jServer.get('download', None)
+        if download:
+            print("Downloading Neo4j docker image", file=log)
+            docker.load(download.get())
+
+        cluster = neo4jServer["cluster"]
+        serverName = neo4jServer["name"]
+        # Each server has a host name of its own, so that servers can run
+        # side by side on the same network
+        hostname = "neo4j-%s" % serverName.replace(".", "")
+
+        # Start a Neo4j server
+        if cluster:
+            print("Starting neo4j cluster (%s)" % serverName, file=log)
+            server = neo4j.Cluster(neo4jServer["image"],
+                                   serverName,
+                                   neo4jArtifactsPath,
+                                   hostname)
+        else:
+            print("Starting neo4j standalone server (%s)" % serverName, file=log)
+            server = neo4j.Standalone(neo4jServer["image"],
+                                      serverName,
+                                      neo4jArtifactsPath,
+                                      hostname, 7687,
+                                      neo4jServer["edition"])
+        server.start()
+        return server
+
+    def start_in_background(neo4jServer):
+        # Output is kept for the log of the server, as it is not interleaved
+        # with the other suites. So is any error, raised once the output is
+        # in the log.
+        output = io.StringIO()
+        try:
+            server = start_neo4j_server(neo4jServer, output)
+        except Exception as e:
+            return None, output.getvalue(), e
+        return server, output.getvalue(), None
+
+    def pull_images(images):
+        for image in images:
+            docker.pull(image)
+
+    # As many servers as are tested side by side are started in the
+    # background, the images of the others are pulled meanwhile.
+    # Side by side, the servers share the backend and the driver container,
+    # so testing one at a time is the default.
+    workers = int(os.environ.get("TEST_NEO4J_WORKERS", 1))
+    startPool = ThreadPoolExecutor(max(workers, 1))
+    starting = {}
+    for neo4jServer in neo4jServers[:max(workers, 1)]:
+        starting[neo4jServer["name"]] = startPool.submit(start_in_background, neo4jServer)
+    print("Starting neo4j servers in the background (%s)" % ", ".join(starting))
+    pulled = set(n["image"] for n in neo4jServers[:max(workers, 1)])
+    images = []
+    for neo4jServer in neo4jServers:
+        if neo4jServer["image"] not in pulled and not neo4jServer.get("download"):
+            pulled.add(neo4jServer["image"])
+            images.append(neo4jServer["image"])
+    # Best effort, so that a failing run does not wait for the pulls to
+    # finish before exiting
+    threading.Thread(target=pull_images, args=(images,), daemon=True).start()
+
     # Bootstrap the driver docker image by running a bootstrap script in
     # the image. The driver docker image only contains the tools needed to
     # build, not the built driver.
@@ -193,11 +325,15 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
         "TEST_BACKEND_HOST": "driver",
         # Driver connects to me
         "TEST_STUB_HOST":    "runner",
+        # Reports of the runner, like stress test results
+        "TEST_ARTIFACTS_PATH": "/artifacts",
+        # Performance baselines are per driver and branch
+        "TEST_BRANCH":       testkitBranch,
     })
     runnerContainer = docker.run(
             runnerImage, "runner",
             command=["python3", "/testkit/driver/bootstrap.py"],
-            mountMap={thisPath: "/testkit"},
+            mountMap={thisPath: "/testkit", artifactsPath: "/artifacts"},
             envMap=runnerEnv,
             network="the-bridge",
             aliases=["thehost", "thehostbutwrong"])  # Used when testing TLS
@@ -207,6 +343,12 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
     """
     runnerContainer.exec(["python3", "-m", "tests.stub.suites"])
 
+    """
+    Performance tests, only when asked for with TEST_PERF=1
+    """
+    if os.environ.get("TEST_PERF") == "1":
+        runnerContainer.exec(["python3", "-m", "tests.perf.suites"])
+
     """
     TLS tests
     """
@@ -219,124 +361,68 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
     """
     Neo4j server tests
     """
-    # Make an artifacts folder where the database can place it's logs, each
-    # time we start a database server we should use a different folder.
-    neo4jArtifactsPath = os.path.join(artifactsPath, "neo4j")
-    os.makedirs(neo4jArtifactsPath)
-
-    neo4jServers = [
-        {
-            "name": "4.2-cluster",
-            "image": "neo4j:4.2-enterprise",
-            "version": "4.2",
-            "edition": "enterprise",
-            "cluster": True,
-            "suite": "",  # TODO: Define cluster suite
-            "scheme": "neo4j"
-        },
-        {
-            "name": "3.5-enterprise",
-            "image": "neo4j:3.5-enterprise",
-            "version": "3.5",
-            "edition": "enterprise",
-            "cluster": False,
-            "suite": "3.5",
-            "scheme": "bolt"
-        },
-        {
-            "name": "4.0-community",
-            "image": "neo4j:4.0",
-            "version": "4.0",
-            "edition": "community",
-            "cluster": False,
-            "suite": "4.0",
-            "scheme": "neo4j"
-        },
-        {
-            "name": "4.1-enterprise",
-            "image": "neo4j:4.1-enterprise",
-            "version": "4.1",
-            "edition": "enterprise",
-            "cluster": False,
-            "suite": "4.1",
-            "scheme": "neo4j"
-        },
-    ]
-    if in_teamcity:
-        # Use last successful build of 4.2.0. Need to update this when a new
-        # patch is in the baking.  When there is an official 4.2 build there
-        # should be a Docker hub based image above (or added when not in
-        # Teamcity).
-        s = {
-            "name": "4.2-tc-enterprise",
-            "image": "neo4j:4.2.3-enterprise",
-            "version": "4.2",
-            "edition": "enterprise",
-            "cluster": False,
-            "suite": "4.2",
-            "scheme": "neo4j",
-            "download": teamcity.DockerImage(
-                "neo4j-enterprise-4.2.3-docker-loadable.tar")
-        }
-        neo4jServers.append(s)
-
-    for neo4jServer in neo4jServers:
-        download = neo4jServer.get('download', None)
-        if download:
-            print("Downloading Neo4j docker image")
-            docker.load(download.get())
 
+    def run_neo4j_server(neo4jServer, log=None):
+        """ Runs all suites against the Neo4j server, started here unless
+        already started in the background, with the output written to the
+        log file if given.
+        """
         cluster = neo4jServer["cluster"]
         serverName = neo4jServer["name"]
-
-        # Start a Neo4j server
-        if cluster:
-            print("Starting neo4j cluster (%s)" % serverName)
-            server = neo4j.Cluster(neo4jServer["image"],
-                                   serverName,
-                                   neo4jArtifactsPath)
+        started = starting.pop(serverName, None)
+        if started:
+            server, output, error = started.result()
+            print(output, end="", file=log)
+            if error:
+                raise error
         else:
-            print("Starting neo4j standalone server (%s)" % serverName)
-            server = neo4j.Standalone(neo4jServer["image"],
-                                      serverName,
-                                      neo4jArtifactsPath,
-                                      "neo4jserver", 7687,
-                                      neo4jServer["edition"])
-        server.start()
+            server = start_neo4j_server(neo4jServer, log)
         hostname, port = server.address()
 
-        # Wait until server is listening before running tests
-        # Use driver container to check for Neo4j availability since connect
+        # Wait until server is ready before running tests. The generic suites
+        # wait for a standalone server by themselves, in process, otherwise
+        # use driver container to check for Neo4j availability since connect
         # will be done from there
-        print("Waiting for neo4j service port to be available")
-        driverContainer.exec([
-            "python3", "/testkit/driver/wait_for_port.py",
-            hostname, "%d" % port])
-        print("Neo4j listens")
+        suite = neo4jServer["suite"]
+        if cluster or not suite:
+            print("Waiting for neo4j to be ready", file=log)
+            server.wait_ready(driverContainer, log)
+            print("Neo4j is ready", file=log)
 
         # Run the actual test suite within the runner container. The tests
         # will connect to driver backend and configure drivers to connect to
         # the neo4j instance.
-        runnerEnv.update({
+        serverRunnerEnv = dict(runnerEnv)
+        serverRunnerEnv.update({
             # Hostname of Docker container runnng db
             "TEST_NEO4J_HOST":   hostname,
             "TEST_NEO4J_USER":   neo4j.username,
             "TEST_NEO4J_PASS":   neo4j.password,
+            "TEST_NEO4J_SCHEME": neo4jServer["scheme"],
         })
 
         # Generic integration tests, requires a backend
-        suite = neo4jServer["suite"]
         if suite:
-            print("Running test suite %s" % suite)
+            print("Running test suite %s" % suite, file=log)
             runnerContainer.exec([
                 "python3", "-m", "tests.neo4j.suites", suite],
-                envMap=runnerEnv)
+                envMap=serverRunnerEnv, log=log)
         else:
-            print("No test suite specified for %s" % serverName)
+            print("No test suite specified for %s" % serverName, file=log)
+
+        # Generic stress tests, requires a backend. Reports throughput and
+        # latencies in the same format for all drivers, see
+        # artifacts/stress/. Only run when asked for with TEST_STRESS=1.
+        if suite and os.environ.get("TEST_STRESS") == "1":
+            print("Running stress tests on %s" % serverName, file=log)
+            runnerContainer.exec([
+                "python3", "-m", "tests.stress.suites", serverName],
+                envMap=serverRunnerEnv, log=log)
 
         # Parameters that might be used by native stress/integration
         # tests suites
-        driverEnv.update({
+        serverDriverEnv = dict(driverEnv)
+        serverDriverEnv.update({
             "TEST_NEO4J_HOST":       hostname,
             "TEST_NEO4J_USER":       neo4j.username,
             "TEST_NEO4J_PASS":       neo4j.password,
@@ -346,9 +432,9 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
             "TEST_NEO4J_VERSION":    neo4jServer["version"],
         })
         if cluster:
-            driverEnv["TEST_NEO4J_IS_CLUSTER"] = "1"
+            serverDriverEnv["TEST_NEO4J_IS_CLUSTER"] = "1"
         else:
-            driverEnv.pop("TEST_NEO4J_IS_CLUSTER", None)
+            serverDriverEnv.pop("TEST_NEO4J_IS_CLUSTER", None)
 
         # To support the legacy .net integration tests
         # TODO: Move this to testkit/driver/dotnet/*.py
@@ -356,7 +442,7 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
         if neo4jServer["edition"] == "enterprise":
             envString += "-e "
         envString += neo4jServer["version"]
-        driverEnv["NEOCTRL_ARGS"] = envString
+        serverDriverEnv["NEOCTRL_ARGS"] = envString
 
         # Run the stress test suite within the driver container.
         # The stress test suite uses threading and put a bigger load on the
@@ -364,36 +450,74 @@ def main(thisPath, driverName, testkitBranch, driverRepo):
         # the driver language.
         # None of the drivers will work properly in cluster.
         if not cluster or driverName in ['go', 'javascript']:
-            print("Building and running stress tests...")
+            print("Building and running stress tests...", file=log)
             driverContainer.exec([
                 "python3", os.path.join(driverGlue, "stress.py")],
-                envMap=driverEnv)
+                envMap=serverDriverEnv, log=log)
         else:
-            print("Skipping stress tests for %s" % serverName)
+            print("Skipping stress tests for %s" % serverName, file=log)
 
         # Run driver native integration tests within the driver container.
         # Driver integration tests should check env variable to skip tests
         # depending on if running in cluster or not, this is not properly done
         # in any (?) driver right now so skip the suite...
         if not cluster or driverName in []:
-            print("Building and running integration tests...")
+            print("Building and running integration tests...", file=log)
             driverContainer.exec([
                 "python3", os.path.join(driverGlue, "integration.py")],
-                envMap=driverEnv)
+                envMap=serverDriverEnv, log=log)
         else:
-            print("Skipping integration tests for %s" % serverName)
+            print("Skipping integration tests for %s" % serverName, file=log)
 
         # Check that all connections to Neo4j has been closed.
         # Each test suite should close drivers, sessions properly so any
         # pending connections detected here should indicate connection leakage
         # in the driver.
-        print("Checking that connections are closed to the database")
+        print("Checking that connections are closed to the database", file=log)
         driverContainer.exec([
             "python3", "/testkit/driver/assert_conns_closed.py",
-            hostname, "%d" % port])
+            hostname, "%d" % port], log=log)
 
         server.stop()
 
+    # Servers are tested side by side, each one with its output collected in
+    # artifacts/neo4j/<name>/output.log and printed once it is done.
+    if workers <= 1:
+        for neo4jServer in neo4jServers:
+            run_neo4j_server(neo4jServer)
+        startPool.shutdown()
+        return
+
+    def run_logged(neo4jServer):
+        path = os.path.join(neo4jArtifactsPath, neo4jServer["name"])
+        os.makedirs(path, exist_ok=True)
+        logPath = os.path.join(path, "output.log")
+        with open(logPath, "w") as log:
+            try:
+                run_neo4j_server(neo4jServer, log)
+            except Exception as e:
+                print("Failed: %s" % e, file=log)
+                raise
+        return logPath
+
+    failed = []
+    with ThreadPoolExecutor(workers) as pool:
+        futures = {pool.submit(run_logged, s): s["name"] for s in neo4jServers}
+        for future in as_completed(futures):
+            name = futures[future]
+            logPath = os.path.join(neo4jArtifactsPath, name, "output.log")
+            print(">>> Output of Neo4j server tests (%s)" % name)
+            if os.path.exists(logPath):
+                with open(logPath) as f:
+                    sys.stdout.write(f.read())
+            print("<<< Output of Neo4j server tests (%s)" % name)
+            sys.stdout.flush()
+            if future.exception():
+                failed.append(name)
+    startPool.shutdown()
+    if failed:
+        raise Exception("Neo4j server tests failed on %s" % ", ".join(failed))
+
 
 if __name__ == "__main__":
     driverName = os.environ.get("TEST_DRIVER_NAME")
@@ -1,4 +1,5 @@
 import docker
+from concurrent.futures import ThreadPoolExecutor
 from os.path import join
 
 
@@ -34,11 +35,22 @@ class Standalone:
             self._image, self._hostname,
             mountMap={logs_path: "/logs"},
             envMap=envMap,
-            network="the-bridge")
+            network="the-bridge",
+            aliases=[self._hostname])
 
     def address(self):
         return (self._hostname, self._port)
 
+    def wait_ready(self, container, log=None):
+        """ Waits until the server accepts a Bolt HELLO, checked from the
+        container. The generic suites wait by themselves instead.
+        """
+        container.exec([
+            "python3", "-m", "boltstub.probe",
+            "-u", username, "-p", password,
+            "%s:%d" % (self._hostname, self._port)],
+            workdir="/testkit", log=log)
+
     def stop(self):
         self._container.rm()
         self._container = None
@@ -48,25 +60,42 @@ class Cluster:
     """ Cluster of Neo4j servers
     """
 
-    def __init__(self, image, name, artifacts_path, num_cores=3):
+    def __init__(self, image, name, artifacts_path, hostname, num_cores=3):
         self.name = name
         self._image = image
         self._artifacts_path = join(artifacts_path, name)
+        # Cores are named after this, so clusters can run side by side
+        self._hostname = hostname
         self._num_cores = num_cores
         self._cores = []
 
     def start(self):
         for i in range(self._num_cores):
-            core = Core(i, self._artifacts_path)
+            core = Core(i, self._artifacts_path, self._hostname)
             self._cores.append(core)
 
         initial_members = ",".join([c.discover for c in self._cores])
 
-        for core in self._cores:
-            core.start(self._image, initial_members, "the-bridge")
+        # Cores wait for each other to form the cluster, so they are all
+        # started at once
+        with ThreadPoolExecutor(self._num_cores) as pool:
+            for started in [pool.submit(core.start, self._image, initial_members, "the-bridge")
+                            for core in self._cores]:
+                started.result()
 
     def address(self):
-        return ("core0", 7687)
+        return ("%s-core0" % self._hostname, 7687)
+
+    def wait_ready(self, container, log=None):
+        """ Waits until all cores hand out a routing table with a leader,
+        followers and all cores as routers, checked from the container.
+        An open port says little about a cluster that is still forming.
+        """
+        container.exec([
+            "python3", "-m", "boltstub.probe",
+            "-u", username, "-p", password] +
+            ["%s:%d" % (core.name, 7687) for core in self._cores],
+            workdir="/testkit", log=log)
 
     def stop(self):
         for core in self._cores:
@@ -81,13 +110,13 @@ class Core:
     TRANSACTION_PORT = 6000
     RAFT_PORT = 7000
 
-    def __init__(self, index, artifacts_path):
-        self.name = "core%d" % index
+    def __init__(self, index, artifacts_path, cluster_hostname):
+        self.name = "%s-core%d" % (cluster_hostname, index)
         self.discover = "%s:%d" % (self.name, Core.DISCOVERY_PORT + index)
         self.transaction = "%s:%d" % (self.name, Core.TRANSACTION_PORT + index)
         self.raft = "%s:%d" % (self.name, Core.RAFT_PORT + index)
         self._index = index
-        self._artifacts_path = join(artifacts_path, self.name)
+        self._artifacts_path = join(artifacts_path, "core%d" % index)
         self._container = None
 
     def start(self, image, initial_members, network):
@@ -119,7 +148,8 @@ class Core:
         logs_path = join(self._artifacts_path, "logs")
         self._container = docker.run(image, self.name,
                                      envMap=envMap, network=network,
-                                     mountMap={logs_path: "/logs"})
+                                     mountMap={logs_path: "/logs"},
+                                     aliases=[self.name])
 
     def stop(self):
         self._container.rm()
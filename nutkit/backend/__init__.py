@@ -1 +1,2 @@
 from nutkit.backend.backend import Backend
+from nutkit.backend.aio import AsyncBackend
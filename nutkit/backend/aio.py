@@ -0,0 +1,184 @@
+"""
+Connection to a driver backend on an asyncio event loop, for running many
+concurrent sessions from a single process. Requests and responses are the
+same as for the synchronous backend, see nutkit.backend.backend.
+"""
+import asyncio
+import collections
+
+import nutkit.protocol as protocol
+from nutkit.backend.backend import Encoder, decodeResponse, decode_hook, debug, default_timeout, \
+    framing, instanceData, protocolClasses
+
+# Longest line of a response that can be read, responses are mostly sent as
+# a single line.
+lineLimit = 1 << 26
+
+
+class AsyncBackend:
+    """ Connection to a driver backend, which may be shared by any number
+    of tasks on the event loop it was connected on.
+
+    A single task reads all responses, matching them to requests by id as
+    the synchronous backend does. Create with AsyncBackend.connect, or
+    AsyncBackend.open on streams that are already connected.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._encoder = Encoder()
+        self._send_lock = asyncio.Lock()
+        self._ids = 0
+        # Futures of requests waiting for a response, oldest first
+        self._pending = collections.OrderedDict()
+        self._framing = "json"
+        self._error = None
+        self._reading = None
+
+    @classmethod
+    async def connect(cls, address, port, framing=framing):
+        try:
+            reader, writer = await asyncio.open_connection(address, port, limit=lineLimit)
+        except ConnectionRefusedError:
+            raise Exception("Driver backend is not running or is not listening on port %d or is just refusing connections" % port)
+        return await cls.open(reader, writer, framing)
+
+    @classmethod
+    async def open(cls, reader, writer, framing=framing):
+        """ Backend on an already open connection.
+        """
+        backend = cls(reader, writer)
+        if framing != "json":
+            await backend._negotiateFraming(framing)
+        backend._reading = asyncio.get_event_loop().create_task(backend._readAll())
+        return backend
+
+    async def _negotiateFraming(self, framing):
+        # Nothing else is in flight yet, so the response is read right here
+        await self.send(protocol.NegotiateFraming([framing]))
+        _, res = await self._read()
+        self._pending.clear()
+        if isinstance(res, protocol.Framing) and res.framing == "packstream":
+            # Imported only now, as it depends on boltstub
+            from nutkit.backend import binary
+            self._binary = binary
+            self._framing = res.framing
+
+    async def close(self):
+        if self._reading:
+            self._reading.cancel()
+        self._writer.close()
+
+    async def send(self, req):
+        """ Sends a request without waiting for the response, returns the
+        id to receive the response by.
+        """
+        async with self._send_lock:
+            if self._error:
+                raise self._error
+            self._ids += 1
+            id = self._ids
+            if self._framing == "packstream":
+                data = self._binary.encodeRequest(req, id, protocolClasses, instanceData)
+                if debug:
+                    print("Request: %r" % instanceData(req))
+            else:
+                reqJson = self._encoder.encode({"name": type(req).__name__, "data": instanceData(req),
+                                                "id": id})
+                if debug:
+                    print("Request: %s" % reqJson)
+                data = ("#request begin\n%s\n#request end\n" % reqJson).encode("utf-8")
+            self._pending[id] = asyncio.get_event_loop().create_future()
+            self._writer.write(data)
+            await self._writer.drain()
+        return id
+
+    async def receive(self, timeout=default_timeout, id=None):
+        """ Waits for the response to the request with the given id, or to
+        the oldest request waiting for a response if no id is given.
+        """
+        if id is None:
+            id = next(iter(self._pending))
+        future = self._pending[id]
+        try:
+            res = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError("No response within %ss" % timeout)
+        finally:
+            # Also when given up on, so that a late response is not taken
+            # for that of another request
+            self._pending.pop(id, None)
+        # All received errors are raised as exceptions
+        if isinstance(res, protocol.BaseError):
+            raise res
+        return res
+
+    async def sendAndReceive(self, req, timeout=default_timeout):
+        id = await self.send(req)
+        return await self.receive(timeout, id)
+
+    async def _readAll(self):
+        try:
+            while True:
+                resId, res = await self._read()
+                future = self._pending.get(resId)
+                if future is None and isinstance(resId, int) and 0 < resId <= self._ids:
+                    # Late response to a request given up on
+                    continue
+                if future is None or future.done():
+                    # Without a known id it answers the oldest request
+                    future = next((f for f in self._pending.values() if not f.done()), None)
+                    if future is None:
+                        continue
+                future.set_result(res)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Fails all requests waiting now and sent from now on
+            self._error = e
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _read(self):
+        """ Reads the next response, returns the request id it carries, if
+        any, along with the decoded response.
+        """
+        if self._framing == "packstream":
+            try:
+                header = await self._reader.readexactly(self._binary.frameHeader.size)
+                size, = self._binary.frameHeader.unpack(header)
+                data = await self._reader.readexactly(size)
+            except asyncio.IncompleteReadError:
+                raise Exception("Backend closed the connection, it has probably crashed")
+            id, res = self._binary.decodeResponse(data, decode_hook)
+            if debug:
+                print("Response: %r" % res)
+            return id, res
+        readline = self._reader.readline
+        while True:
+            line = (await readline()).decode("utf-8")
+            if not line:
+                raise Exception("Backend closed the connection, it has probably crashed")
+            line = line.strip()
+            if line == "#response begin":
+                break
+            if line and debug:
+                print("[BACKEND]: %s" % line)
+        parts = []
+        while True:
+            line = (await readline()).decode("utf-8")
+            if not line:
+                raise Exception("Backend closed the connection, it has probably crashed")
+            if line.startswith("#"):
+                line = line.strip()
+                if line == "#response end":
+                    break
+                if line == "#response begin":
+                    raise Exception("Already in response")
+            parts.append(line)
+        response = "".join(parts)
+        if debug:
+            print("Response: %s" % response)
+        return decodeResponse(response)
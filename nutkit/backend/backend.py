@@ -1,36 +1,92 @@
 import json
 import sys
 import inspect
+import itertools
+import collections
 import threading
 import socket
+import time
 import os
 
 import nutkit.protocol as protocol
 
 protocolClasses = dict([m for m in inspect.getmembers(protocol, inspect.isclass)])
 debug = os.environ.get('TEST_DEBUG_REQRES', 0)
+# Framing to negotiate with the backend, "json" or "packstream"
+framing = os.environ.get('TEST_BACKEND_FRAMING', 'json')
+
+
+def _constructor(cls):
+    """ Function creating an instance of the class from the data of a
+    message, precomputed per protocol class.
+    """
+    try:
+        parameters = list(inspect.signature(cls).parameters)
+    except (TypeError, ValueError):
+        parameters = None
+    positional = parameters == ["value"]
+
+    def construct(data):
+        if not data:
+            return cls()
+        if positional and "value" in data:
+            # Most Cypher values, passed positionally
+            return cls(data["value"])
+        return cls(**data)
+    return construct
+
+
+# Constructor of each protocol class, by name
+constructors = {name: _constructor(cls) for name, cls in protocolClasses.items()}
+
+# Names of instance variables of protocol classes with __slots__, by class
+slots = {cls: cls.__slots__ for cls in protocolClasses.values() if "__slots__" in vars(cls)}
+
+
+def instanceData(o):
+    """ Instance variables of a protocol class instance, as sent in the data
+    of a message.
+    """
+    names = slots.get(type(o))
+    if names is None:
+        return o.__dict__
+    return {name: getattr(o, name) for name in names}
+
 
 class Encoder(json.JSONEncoder):
     def default(self, o):
         name = type(o).__name__
         if name in protocolClasses:
-            return {"name":name, "data":o.__dict__ }
+            return {"name":name, "data":instanceData(o) }
         return json.JSONEncoder.default(self, o)
 
 
 def decode_hook(x):
-    if not 'name' in x:
+    try:
+        construct = constructors.get(x.get('name'))
+    except TypeError:
+        # Unhashable name, in a map of Cypher values
         return x
-
-    name = x['name']
-    if not name in protocolClasses:
+    if construct is None:
         return x
+    return construct(x.get('data'))
+
+
+def decodeResponse(response):
+    """ Request id and response decoded from the JSON text of a response.
+    """
+    envelope = {}
 
-    data = x.get('data', {})
-    if not data:
-        data = {}
+    def hook(x):
+        # The response itself is the last object to be decoded
+        envelope["id"] = x.get("id")
+        return decode_hook(x)
 
-    return protocolClasses[name](**data)
+    try:
+        res = json.loads(response, object_hook=hook)
+    except json.decoder.JSONDecodeError:
+        raise Exception("Failed to decode: %s" % response)
+    return envelope.get("id"), res
 
 
 # How long to wait before backend responds
@@ -38,7 +94,20 @@ default_timeout = 10
 
 
 class Backend:
-    def __init__(self, address, port):
+    """ Connection to a driver backend, which may be shared by any number
+    of threads.
+
+    Every request is sent with an id, which backends supporting pipelining
+    send back in the "id" field of the response. This allows any number of
+    requests to be in flight, with responses matched to requests in whatever
+    order they arrive. Responses without an id are matched to the oldest
+    request still waiting for a response.
+
+    Requests and responses are framed as JSON text, unless another framing
+    is negotiated with the backend on connecting.
+    """
+
+    def __init__(self, address, port, framing=framing):
         self._socket = socket.socket(socket.AF_INET)
         try:
             self._socket.connect((address, port))
@@ -47,62 +116,153 @@ class Backend:
         self._encoder = Encoder()
         self._reader = self._socket.makefile(mode='r', encoding='utf-8')
         self._writer = self._socket.makefile(mode='w', encoding='utf-8')
+        self._ids = itertools.count(1)
+        self._send_lock = threading.Lock()
+        # Guards all below, notified whenever a response has been read
+        self._received = threading.Condition()
+        # Ids of requests waiting for a response, oldest first
+        self._pending = collections.OrderedDict()
+        # Responses read by one thread on behalf of another, by request id
+        self._responses = {}
+        self._reading = False
+        self._framing = "json"
+        if framing != "json":
+            self._negotiateFraming(framing)
+
+    def _negotiateFraming(self, framing):
+        try:
+            res = self.sendAndReceive(protocol.NegotiateFraming([framing]))
+        except protocol.BackendError:
+            return
+        if res.framing == "packstream":
+            # Imported only now, as it depends on boltstub
+            from nutkit.backend import binary
+            self._binary = binary
+            self._binaryReader = self._socket.makefile(mode='rb')
+            self._binaryWriter = self._socket.makefile(mode='wb')
+            self._framing = res.framing
 
     def close(self):
         self._socket.shutdown(socket.SHUT_RDWR)
         self._socket.close()
 
     def send(self, req):
-        reqJson = self._encoder.encode(req)
-        if debug:
-            print("Request: %s" % reqJson)
-        self._writer.write("#request begin\n")
-        self._writer.write(reqJson+"\n")
-        self._writer.write("#request end\n")
-        self._writer.flush()
+        """ Sends a request without waiting for the response, returns the
+        id to receive the response by.
+        """
+        with self._send_lock:
+            id = next(self._ids)
+            if self._framing == "packstream":
+                frame = self._binary.encodeRequest(req, id, protocolClasses, instanceData)
+                if debug:
+                    print("Request: %r" % instanceData(req))
+                with self._received:
+                    self._pending[id] = None
+                self._binaryWriter.write(frame)
+                self._binaryWriter.flush()
+                return id
+            reqJson = self._encoder.encode({"name": type(req).__name__, "data": instanceData(req),
+                                            "id": id})
+            if debug:
+                print("Request: %s" % reqJson)
+            with self._received:
+                self._pending[id] = None
+            self._writer.write("#request begin\n")
+            self._writer.write(reqJson+"\n")
+            self._writer.write("#request end\n")
+            self._writer.flush()
+        return id
 
-    def receive(self, timeout=default_timeout):
+    def receive(self, timeout=default_timeout, id=None):
+        """ Waits for the response to the request with the given id, or to
+        the oldest request waiting for a response if no id is given.
+        """
+        deadline = time.monotonic() + timeout
+        with self._received:
+            if id is None and self._pending:
+                id = next(iter(self._pending))
+            while id not in self._responses:
+                if self._reading:
+                    # Another thread is reading, it will hand over ours
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._received.wait(remaining):
+                        raise socket.timeout("No response within %ss" % timeout)
+                    continue
+                self._reading = True
+                try:
+                    self._received.release()
+                    try:
+                        resId, res = self._read(max(deadline - time.monotonic(), 0.001))
+                    finally:
+                        self._received.acquire()
+                    if resId not in self._pending and self._pending:
+                        resId = next(iter(self._pending))
+                    self._pending.pop(resId, None)
+                    if id is None:
+                        id = resId
+                    self._responses[resId] = res
+                finally:
+                    self._reading = False
+                    self._received.notify_all()
+            res = self._responses.pop(id)
+        # All received errors are raised as exceptions
+        if isinstance(res, protocol.BaseError):
+            raise res
+        return res
+
+    def _read(self, timeout):
+        """ Reads the next response, returns the request id it carries, if
+        any, along with the decoded response.
+        """
         self._socket.settimeout(timeout)
-        response = ""
-        in_response = False
-        num_blanks = 0
+        if self._framing == "packstream":
+            return self._readFrame()
+        readline = self._reader.readline
         while True:
-            line = self._reader.readline().strip()
+            line = readline()
+            if not line:
+                raise Exception("Backend closed the connection, it has probably crashed")
+            line = line.strip()
             if line == "#response begin":
-                if in_response:
-                    raise "already in response"
-                in_response = True
-            elif line == "#response end":
-                if debug:
-                    try:
-                        print("Response: %s" % response)
-                    except UnicodeEncodeError:
-                        print("Response: <invalid unicode>")
-                try:
-                    res = json.loads(response, object_hook=decode_hook)
-                except json.decoder.JSONDecodeError:
-                    raise Exception("Failed to decode: %s" % response)
-
-                # All received errors are raised as exceptions
-                if isinstance(res, protocol.BaseError):
-                    raise res
-                return res
-            else:
-                if in_response:
-                    response = response + line
-                else:
-                    # When backend crashes we will end up reading empty lines
-                    # until end of universe. Use this simple check to detect
-                    # this condition and abort.
-                    if not line:
-                        num_blanks += 1
-                        if num_blanks > 50:
-                            raise Exception("Detected possible backend crash")
-                    # The backend can send it's own logs outside of response blocks
-                    elif debug:
-                        print("[BACKEND]: %s" % line)
+                break
+            # The backend can send it's own logs outside of response blocks
+            if line and debug:
+                print("[BACKEND]: %s" % line)
+        # Collect the lines as they are, JSON never spans lines within a
+        # string so the line breaks are insignificant whitespace.
+        parts = []
+        while True:
+            line = readline()
+            if not line:
+                raise Exception("Backend closed the connection, it has probably crashed")
+            if line.startswith("#"):
+                line = line.strip()
+                if line == "#response end":
+                    break
+                if line == "#response begin":
+                    raise Exception("Already in response")
+            parts.append(line)
+        response = "".join(parts)
+        if debug:
+            try:
+                print("Response: %s" % response)
+            except UnicodeEncodeError:
+                print("Response: <invalid unicode>")
+        return decodeResponse(response)
 
-    def sendAndReceive(self, req, timeout=default_timeout):
-        self.send(req)
-        return self.receive(timeout)
+    def _readFrame(self):
+        header = self._binaryReader.read(self._binary.frameHeader.size)
+        if len(header) < self._binary.frameHeader.size:
+            raise Exception("Backend closed the connection, it has probably crashed")
+        size, = self._binary.frameHeader.unpack(header)
+        data = self._binaryReader.read(size)
+        if len(data) < size:
+            raise Exception("Backend closed the connection, it has probably crashed")
+        id, res = self._binary.decodeResponse(data, decode_hook)
+        if debug:
+            print("Response: %r" % res)
+        return id, res
 
+    def sendAndReceive(self, req, timeout=default_timeout):
+        id = self.send(req)
+        return self.receive(timeout, id)
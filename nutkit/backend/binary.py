@@ -0,0 +1,121 @@
+"""
+Binary framing of requests and responses, negotiated with backends that
+support it as a more compact alternative to JSON text.
+
+Each request and response is sent as a frame of a 4 byte big-endian size
+followed by a single PackStream value. Requests and responses are maps of
+the same shape as in JSON:
+
+    {"name": <class name>, "data": {<all instance variables>}, "id": <id>}
+
+except for Cypher values. Each of these is sent as a structure with tag 0x56
+("V") holding the value in native PackStream form:
+
+    CypherNull      null
+    CypherBool      boolean
+    CypherInt       integer
+    CypherFloat     float
+    CypherString    string
+    CypherList      list of native values
+    CypherMap       map of native values
+    Node            structure 0x4E ("N") of id, labels and props
+
+So a Record of CypherInt(1) and CypherList([CypherString("a")]) is sent as
+{"name": "Record", "data": {"values": [V(1), V(["a"])]}}.
+"""
+import struct
+
+import nutkit.protocol as protocol
+from boltstub.packstream import Packer, Structure, UnpackableBuffer, Unpacker
+
+# Size of each frame
+frameHeader = struct.Struct(">I")
+
+VALUE = b"V"
+NODE = b"N"
+
+
+def unbox(value):
+    """ Native form of a Cypher value.
+    """
+    t = type(value)
+    if t is protocol.CypherList:
+        return [unbox(x) for x in value.value]
+    elif t is protocol.CypherMap:
+        return {k: unbox(x) for k, x in value.value.items()}
+    elif t is protocol.Node:
+        return Structure(NODE, unbox(value.id), unbox(value.labels), unbox(value.props))
+    else:
+        return value.value
+
+
+def box(value):
+    """ Cypher value of a native value.
+    """
+    t = type(value)
+    if t is str:
+        return protocol.CypherString(value)
+    elif t is int:
+        return protocol.CypherInt(value)
+    elif t is list:
+        return protocol.CypherList([box(x) for x in value])
+    elif t is dict:
+        return protocol.CypherMap({k: box(x) for k, x in value.items()})
+    elif t is float:
+        return protocol.CypherFloat(value)
+    elif t is bool:
+        return protocol.CypherBool(value)
+    elif value is None:
+        return protocol.CypherNull()
+    elif t is Structure and value.tag == NODE:
+        return protocol.Node(*map(box, value.fields))
+    raise ValueError("Unsupported Cypher value %r" % (value,))
+
+
+cypherTypes = {protocol.CypherNull, protocol.CypherBool, protocol.CypherInt,
+               protocol.CypherFloat, protocol.CypherString, protocol.CypherList,
+               protocol.CypherMap, protocol.Node}
+
+
+def _encode(value, protocolClasses, instanceData):
+    t = type(value)
+    if t in cypherTypes:
+        return Structure(VALUE, unbox(value))
+    elif t is dict:
+        return {k: _encode(x, protocolClasses, instanceData) for k, x in value.items()}
+    elif t is list or t is tuple:
+        return [_encode(x, protocolClasses, instanceData) for x in value]
+    elif t.__name__ in protocolClasses:
+        return {"name": t.__name__,
+                "data": _encode(instanceData(value), protocolClasses, instanceData)}
+    return value
+
+
+def _decode(value, decode_hook):
+    t = type(value)
+    if t is dict:
+        return decode_hook({k: _decode(x, decode_hook) for k, x in value.items()})
+    elif t is list:
+        return [_decode(x, decode_hook) for x in value]
+    elif t is Structure and value.tag == VALUE:
+        return box(value.fields[0])
+    return value
+
+
+def encodeRequest(req, id, protocolClasses, instanceData):
+    """ Frame holding the request with the given id.
+    """
+    packer = Packer(bytearray(frameHeader.size))
+    packer.pack({"name": type(req).__name__,
+                 "data": _encode(instanceData(req), protocolClasses, instanceData),
+                 "id": id})
+    data = packer.data
+    data[:frameHeader.size] = frameHeader.pack(len(data) - frameHeader.size)
+    return data
+
+
+def decodeResponse(data, decode_hook):
+    """ Request id and response held by the body of a frame.
+    """
+    envelope = Unpacker(UnpackableBuffer(memoryview(data))).unpack()
+    return envelope.get("id"), _decode(envelope, decode_hook)
@@ -1,2 +1,3 @@
 from nutkit.frontend.driver import Driver
 from nutkit.protocol import AuthorizationToken, NullRecord
+from nutkit.frontend.aio import AsyncDriver
@@ -0,0 +1,13 @@
+"""
+Frontend for driving a backend from coroutines on an asyncio event loop,
+over an AsyncBackend. Mirrors the synchronous frontend, with every method
+that talks to the backend being a coroutine:
+
+    backend = await AsyncBackend.connect(address, port)
+    driver = await AsyncDriver.create(backend, uri, authToken)
+    session = await driver.session("w")
+    result = await session.run("RETURN 1 AS n")
+    async for record in result:
+        ...
+"""
+from nutkit.frontend.aio.driver import AsyncDriver
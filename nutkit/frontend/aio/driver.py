@@ -0,0 +1,31 @@
+import nutkit.protocol as protocol
+
+from .session import AsyncSession
+
+
+class AsyncDriver:
+    def __init__(self, backend, driver):
+        self._backend = backend
+        self._driver = driver
+
+    @classmethod
+    async def create(cls, backend, uri, authToken, userAgent=None):
+        req = protocol.NewDriver(uri, authToken, userAgent=userAgent)
+        res = await backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Driver):
+            raise Exception("Should be driver")
+        return cls(backend, res)
+
+    async def close(self):
+        req = protocol.DriverClose(self._driver.id)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Driver):
+            raise Exception("Should be driver")
+
+    async def session(self, accessMode, bookmarks=None, database=None, fetchSize=None):
+        req = protocol.NewSession(self._driver.id, accessMode,
+            bookmarks=bookmarks, database=database, fetchSize=fetchSize)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Session):
+            raise Exception("Should be session")
+        return AsyncSession(self._backend, res)
@@ -0,0 +1,83 @@
+import collections
+
+import nutkit.protocol as protocol
+
+
+class AsyncResult:
+    # Number of records retrieved per request when iterating
+    batchSize = 100
+
+    def __init__(self, backend, result):
+        self._backend = backend
+        self._result = result
+        # Records retrieved in batches but not yet returned
+        self._records = collections.deque()
+        # Id of the request for the next batch, when sent ahead of time
+        self._prefetch = None
+        self._exhausted = False
+        # Whether the backend supports batches, None until known
+        self._batches = None
+
+    async def next(self):
+        """ Moves to next record in result.
+        """
+        if self._records or self._prefetch:
+            return await self._nextBatched()
+        req = protocol.ResultNext(self._result.id)
+        return await self._backend.sendAndReceive(req)
+
+    async def consume(self):
+        """ Discards all records in result and returns summary.
+        """
+        self._records.clear()
+        if self._prefetch:
+            await self._receiveBatch()
+        req = protocol.ResultConsume(self._result.id)
+        return await self._backend.sendAndReceive(req)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """ Iterates over the remaining records in batches, as the
+        synchronous result does.
+        """
+        if self._batches is False:
+            record = await self.next()
+        else:
+            record = await self._nextBatched()
+        if isinstance(record, protocol.NullRecord):
+            raise StopAsyncIteration
+        return record
+
+    async def _nextBatched(self):
+        if not self._records and not self._exhausted:
+            if not self._prefetch:
+                await self._sendBatch()
+            await self._receiveBatch()
+            if self._batches is False:
+                return await self.next()
+            if not self._exhausted:
+                await self._sendBatch()
+        if self._records:
+            return self._records.popleft()
+        return protocol.NullRecord()
+
+    async def _sendBatch(self):
+        req = protocol.ResultNextBatch(self._result.id, self.batchSize)
+        self._prefetch = await self._backend.send(req)
+
+    async def _receiveBatch(self):
+        id, self._prefetch = self._prefetch, None
+        try:
+            res = await self._backend.receive(id=id)
+        except protocol.BackendError:
+            if self._batches:
+                raise
+            # Backend does not know about batches, fall back to ResultNext
+            self._batches = False
+            return
+        self._batches = True
+        self._records.extend(res.records)
+        if len(res.records) < self.batchSize:
+            self._exhausted = True
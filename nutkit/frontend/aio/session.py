@@ -0,0 +1,65 @@
+import nutkit.protocol as protocol
+from .result import AsyncResult
+from .transaction import AsyncTransaction
+
+
+class AsyncSession:
+    def __init__(self, backend, session):
+        self._backend = backend
+        self._session = session
+
+    async def close(self):
+        req = protocol.SessionClose(self._session.id)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Session):
+            raise Exception("Should be session")
+
+    async def run(self, cypher, params=None, txMeta=None, timeout=None):
+        req = protocol.SessionRun(self._session.id, cypher, params, txMeta=txMeta, timeout=timeout)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Result):
+            raise Exception("Should be result")
+        return AsyncResult(self._backend, res)
+
+    async def processTransaction(self, req, fn, config=None):
+        # As in the synchronous session, fn is a coroutine function
+        id = await self._backend.send(req)
+        x = None
+        while True:
+            res = await self._backend.receive(id=id)
+            if isinstance(res, protocol.RetryableTry):
+                tx = AsyncTransaction(self._backend, res.id)
+                try:
+                    x = await fn(tx)
+                    id = await self._backend.send(protocol.RetryablePositive(self._session.id))
+                except Exception as e:
+                    if isinstance(e, protocol.BackendError):
+                        raise e
+                    errorId = ""
+                    if isinstance(e, protocol.DriverError):
+                        errorId = e.id
+                    id = await self._backend.send(protocol.RetryableNegative(self._session.id, errorId=errorId))
+            elif isinstance(res, protocol.RetryableDone):
+                return x
+
+    async def readTransaction(self, fn, txMeta=None, timeout=None):
+        req = protocol.SessionReadTransaction(self._session.id, txMeta=txMeta, timeout=timeout)
+        return await self.processTransaction(req, fn)
+
+    async def writeTransaction(self, fn, txMeta=None, timeout=None):
+        req = protocol.SessionWriteTransaction(self._session.id, txMeta=txMeta, timeout=timeout)
+        return await self.processTransaction(req, fn)
+
+    async def beginTransaction(self, txMeta=None, timeout=None):
+        req = protocol.SessionBeginTransaction(self._session.id, txMeta=txMeta, timeout=timeout)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Transaction):
+            raise Exception("Should be Transaction")
+        return AsyncTransaction(self._backend, res.id)
+
+    async def lastBookmarks(self):
+        req = protocol.SessionLastBookmarks(self._session.id)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Bookmarks):
+            raise Exception("Should be Bookmarks")
+        return res.bookmarks
@@ -0,0 +1,27 @@
+import nutkit.protocol as protocol
+from .result import AsyncResult
+
+
+class AsyncTransaction:
+    def __init__(self, backend, id):
+        self._backend = backend
+        self._id = id
+
+    async def run(self, cypher, params=None):
+        req = protocol.TransactionRun(self._id, cypher, params)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Result):
+            raise Exception("Should be result")
+        return AsyncResult(self._backend, res)
+
+    async def commit(self):
+        req = protocol.TransactionCommit(self._id)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Transaction):
+            raise Exception("Should be transaction")
+
+    async def rollback(self):
+        req = protocol.TransactionRollback(self._id)
+        res = await self._backend.sendAndReceive(req)
+        if not isinstance(res, protocol.Transaction):
+            raise Exception("Should be transaction")
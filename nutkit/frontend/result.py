@@ -1,19 +1,82 @@
+import collections
+
 import nutkit.protocol as protocol
 
 
 class Result:
+    # Number of records retrieved per request when iterating
+    batchSize = 100
+
     def __init__(self, backend, result):
         self._backend = backend
         self._result = result
+        # Records retrieved in batches but not yet returned
+        self._records = collections.deque()
+        # Id of the request for the next batch, when sent ahead of time
+        self._prefetch = None
+        self._exhausted = False
+        # Whether the backend supports batches, None until known
+        self._batches = None
 
     def next(self):
         """ Moves to next record in result.
         """
+        if self._records or self._prefetch:
+            return self._nextBatched()
         req = protocol.ResultNext(self._result.id)
         return self._backend.sendAndReceive(req)
 
     def consume(self):
         """ Discards all records in result and returns summary.
         """
+        self._records.clear()
+        if self._prefetch:
+            self._receiveBatch()
         req = protocol.ResultConsume(self._result.id)
         return self._backend.sendAndReceive(req)
+
+    def __iter__(self):
+        """ Iterates over the remaining records, which are retrieved in
+        batches, with the next batch asked for before the current one is
+        used up. Use next to retrieve one record per request instead.
+        """
+        while True:
+            if self._batches is False:
+                record = self.next()
+            else:
+                record = self._nextBatched()
+            if isinstance(record, protocol.NullRecord):
+                return
+            yield record
+
+    def _nextBatched(self):
+        if not self._records and not self._exhausted:
+            if not self._prefetch:
+                self._sendBatch()
+            self._receiveBatch()
+            if self._batches is False:
+                return self.next()
+            if not self._exhausted:
+                self._sendBatch()
+        if self._records:
+            return self._records.popleft()
+        return protocol.NullRecord()
+
+    def _sendBatch(self):
+        req = protocol.ResultNextBatch(self._result.id, self.batchSize)
+        self._prefetch = self._backend.send(req)
+
+    def _receiveBatch(self):
+        id, self._prefetch = self._prefetch, None
+        try:
+            res = self._backend.receive(id=id)
+        except protocol.BackendError:
+            if self._batches:
+                raise
+            # Backend does not know about batches, fall back to ResultNext
+            self._batches = False
+            return
+        self._batches = True
+        self._records.extend(res.records)
+        if len(res.records) < self.batchSize:
+            self._exhausted = True
@@ -22,10 +22,12 @@ class Session:
         return Result(self._backend, res)
 
     def processTransaction(self, req, fn, config=None):
-        self._backend.send(req)
+        # Each response of the retry loop answers the last request sent
+        # here, other requests made by fn may be in flight in between.
+        id = self._backend.send(req)
         x = None
         while True:
-            res = self._backend.receive()
+            res = self._backend.receive(id=id)
             if isinstance(res, protocol.RetryableTry):
                 tx = Transaction(self._backend, res.id)
                 try:
@@ -34,7 +36,7 @@ class Session:
                     x = fn(tx)
                     # The frontend test function were fine with the interaction, notify backend
                     # that we're happy to go.
-                    self._backend.send(protocol.RetryablePositive(self._session.id))
+                    id = self._backend.send(protocol.RetryablePositive(self._session.id))
                 except Exception as e:
                     # If the backend failed to handle this, raise for easier debugging
                     if isinstance(e, protocol.BackendError):
@@ -46,7 +48,7 @@ class Session:
                     errorId = ""
                     if isinstance(e, protocol.DriverError):
                         errorId = e.id
-                    self._backend.send(protocol.RetryableNegative(self._session.id, errorId=errorId))
+                    id = self._backend.send(protocol.RetryableNegative(self._session.id, errorId=errorId))
             elif isinstance(res, protocol.RetryableDone):
                 return x
 
@@ -10,12 +10,16 @@ All cypher types are sent from backend as:
             <all instance variables>
         }
     }
+
+Many of these are created for every result, so they use __slots__.
 """
 
 
 class CypherNull:
     """ Represents null/nil as sent/received to/from the database
     """
+    __slots__ = ("value",)
+
     def __init__(self, value=None):
         self.value = None
 
@@ -27,6 +31,8 @@ class CypherNull:
 
 
 class CypherList:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -41,6 +47,8 @@ class CypherList:
 
 
 class CypherMap:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -55,6 +63,8 @@ class CypherMap:
 
 
 class CypherInt:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -66,6 +76,8 @@ class CypherInt:
 
 
 class CypherBool:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -77,6 +89,8 @@ class CypherBool:
 
 
 class CypherFloat:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -88,6 +102,8 @@ class CypherFloat:
 
 
 class CypherString:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -99,6 +115,8 @@ class CypherString:
 
 
 class Node:
+    __slots__ = ("id", "labels", "props")
+
     def __init__(self, id, labels, props):
         self.id = id
         self.labels = labels
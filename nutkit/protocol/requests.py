@@ -8,15 +8,34 @@ All requests will be sent to backend as:
         name: <class name>,
         data: {
             <all instance variables>
-        }
+        },
+        id: <request id>
     }
 
+The request id is a number unique to the connection. Backends that copy it
+into the id of the response may handle requests in any order and respond as
+soon as each one is done, others must respond in the order of the requests.
+
 Backend responds with a suitable response as defined in responses.py or an
 error as defined
 in errors.py. See the requests for information on which response they expect.
 """
 
 
+class NegotiateFraming:
+    """ Request to switch to another framing of requests and responses than
+    JSON text, from the next request on.
+    Backend should respond with a Framing response naming the framing it
+    picked from the offered ones, still framed as JSON. Backends without
+    support for any other framing may respond with an Error response, JSON
+    is then kept. See nutkit.backend.binary for the "packstream" framing.
+    """
+
+    def __init__(self, framings):
+        # Names of framings, in order of preference
+        self.framings = framings
+
+
 class NewDriver:
     """ Request to create a new driver instance on the backend.
     Backend should respond with a Driver response or an Error response.
@@ -180,6 +199,20 @@ class ResultNext:
         self.resultId = resultId
 
 
+class ResultNextBatch:
+    """ Request to retrieve up to size records at once on a result living on
+    the backend, as if by repeated ResultNext requests.
+    Backend should respond with Records, holding fewer records than asked
+    for only when there are no more records, or an Error if an error
+    occured before retrieving any record. Records retrieved before an error
+    should be sent, with the error sent in response to the next request.
+    """
+
+    def __init__(self, resultId, size):
+        self.resultId = resultId
+        self.size = size
+
+
 class ResultConsume:
     """ Request to close the result and to discard all remaining records back
     in the response.  Backend should respond with ClosedResult or an Error if
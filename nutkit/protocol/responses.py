@@ -7,7 +7,8 @@ All responses are sent from backend as:
         name: <class name>
         data: {
             <all instance variables in python class>
-        }
+        },
+        id: <id of the request, optional>
     }
 
 For example response to NewDriver request should be sent from backend as:
@@ -21,6 +22,16 @@ For example response to NewDriver request should be sent from backend as:
 """
 
 
+class Framing:
+    """ Represents the framing picked by the backend in response to a
+    NegotiateFraming request.
+    """
+
+    def __init__(self, framing):
+        # Name of framing, such as "json" or "packstream"
+        self.framing = framing
+
+
 class Driver:
     """ Represents a driver instance on the backend
     """
@@ -65,6 +76,8 @@ class Record:
     should not keep it in memory.
     """
 
+    __slots__ = ("values",)
+
     def __init__(self, values=None):
         """ values is a list of field values where each value is a CypherX
         instance Backend sends Record with values =
@@ -115,6 +128,15 @@ class NullRecord:
         return isinstance(other, NullRecord)
 
 
+class Records:
+    """ Represents a batch of records, sent in response to ResultNextBatch.
+    """
+
+    def __init__(self, records=None):
+        # List of Record, empty when left out by the backend
+        self.records = records or []
+
+
 class Summary:
     """ Represents summary returned from a ResultConsume request.
     """
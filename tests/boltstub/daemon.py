@@ -0,0 +1,70 @@
+"""
+Outcome of stub servers as reported by the boltstub daemon, runs without a
+driver:
+
+    python -m unittest tests.boltstub.daemon
+"""
+import json
+import socket
+import threading
+import unittest
+
+from boltstub.daemon import StubDaemon
+
+
+script = """
+!: BOLT 4
+C: RESET
+S: SUCCESS {}
+"""
+
+handshake = b"\x60\x60\xB0\x17" + b"\x00\x00\x00\x04" + b"\x00" * 12
+
+
+class Daemon(unittest.TestCase):
+    def setUp(self):
+        self._daemon = StubDaemon(("127.0.0.1", 0))
+        threading.Thread(target=self._daemon.serve_forever, daemon=True).start()
+        self._control = socket.create_connection(self._daemon.server_address[:2])
+        self._file = self._control.makefile("rw", encoding="utf-8")
+
+    def tearDown(self):
+        self._file.close()
+        self._control.close()
+        self._daemon.shutdown()
+        self._daemon.server_close()
+
+    def request(self, name, **data):
+        data["name"] = name
+        self._file.write(json.dumps(data) + "\n")
+        self._file.flush()
+        return json.loads(self._file.readline())
+
+    def play(self, message):
+        """ Sends the message, in a single chunk, to a new stub server and
+        returns the outcome of the stub server.
+        """
+        port = self.request("start", script=script, listen="127.0.0.1:0", timeout=5)["port"]
+        with socket.create_connection(("127.0.0.1", port)) as client:
+            client.sendall(handshake)
+            self.assertEqual(client.recv(4), b"\x00\x00\x00\x04")
+            client.sendall(len(message).to_bytes(2, "big") + message + b"\x00\x00")
+            client.recv(1024)
+        return self.request("done", port=port, timeout=5)
+
+    def test_mismatch(self):
+        # Structure of the unexpected tag 0xC7 and no fields
+        response = self.play(b"\xB0\xC7")
+        self.assertEqual(response["exit_code"], 1)
+        self.assertIn("Script mismatch", response["output"])
+
+    def test_other_error(self):
+        # RESET with an invalid PackStream marker as field, which fails in
+        # the stub server before it gets to match the script
+        response = self.play(b"\xB1\x0F\xC7")
+        self.assertEqual(response["exit_code"], 99)
+        self.assertIn("Unknown PackStream marker", response["output"])
+
+
+if __name__ == "__main__":
+    unittest.main()
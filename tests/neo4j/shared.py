@@ -7,6 +7,7 @@ TEST_NEO4J_HOST    Neo4j server host, no default, required
 TEST_NEO4J_PORT    Neo4j server port, default is 7687
 """
 import os
+from boltstub.probe import wait_until_ready
 from nutkit.frontend import Driver, AuthorizationToken
 
 
@@ -37,3 +38,12 @@ def get_driver(backend):
     scheme = "bolt://%s:%d" % (host, port)
     return Driver(backend, scheme, get_authorization())
 
+
+def wait_for_neo4j(timeout=120):
+    """ Waits until the Neo4j server accepts a Bolt HELLO, returns whether
+    it did before the timeout
+    """
+    host, port = get_neo4j_host_and_port()
+    auth = get_authorization()
+    return wait_until_ready(["%s:%d" % (host, int(port))],
+                            auth.principal, auth.credentials, timeout)
@@ -9,6 +9,7 @@ import tests.neo4j.sessionrun as sessionrun
 import tests.neo4j.txfuncrun as txfuncrun
 import tests.neo4j.txrun as txrun
 import tests.neo4j.authentication as authentication
+from tests.neo4j.shared import wait_for_neo4j
 from tests.testenv import (
         get_test_result_class, begin_test_suite, end_test_suite)
 
@@ -74,6 +75,10 @@ if __name__ == "__main__":
         print("Unknown suite name: " + name)
         sys.exit(-1)
 
+    if not wait_for_neo4j():
+        print("Neo4j server is not ready")
+        sys.exit(-1)
+
     suite_name = "Integration tests " + name
     begin_test_suite(suite_name)
     runner = unittest.TextTestRunner(
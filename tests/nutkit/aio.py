@@ -0,0 +1,168 @@
+"""
+Asynchronous backend connection and frontend of nutkit, run against a fake
+backend over a socket pair, without a driver:
+
+    python -m unittest tests.nutkit.aio
+"""
+import asyncio
+import json
+import socket
+import unittest
+
+from nutkit.backend import AsyncBackend
+from nutkit.frontend import AsyncDriver, AuthorizationToken
+import nutkit.protocol as types
+
+
+class FakeBackend:
+    """ The backend end of the socket pair, with requests queued for the
+    test to respond to as it sees fit.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self.requests = asyncio.Queue()
+        self._reading = asyncio.get_event_loop().create_task(self._readAll())
+
+    async def _readAll(self):
+        lines = []
+        while True:
+            line = (await self._reader.readline()).decode("utf-8")
+            if not line:
+                return
+            line = line.strip()
+            if line == "#request begin":
+                lines = []
+            elif line == "#request end":
+                await self.requests.put(json.loads("".join(lines)))
+            else:
+                lines.append(line)
+
+    async def request(self):
+        return await asyncio.wait_for(self.requests.get(), 1)
+
+    def respond(self, name, data, id=None):
+        response = {"name": name, "data": data}
+        if id is not None:
+            response["id"] = id
+        self._writer.write(("#response begin\n%s\n#response end\n" % json.dumps(response)).encode("utf-8"))
+
+    def close(self):
+        self._reading.cancel()
+        self._writer.close()
+
+
+class AsyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self._loop.close()
+
+    def run_test(self, test):
+        """ Runs the coroutine function with a backend connected to a fake
+        backend.
+        """
+        async def run():
+            a, b = socket.socketpair()
+            backend = await AsyncBackend.open(*await asyncio.open_connection(sock=a))
+            fake = FakeBackend(*await asyncio.open_connection(sock=b))
+            try:
+                await test(backend, fake)
+            finally:
+                await backend.close()
+                fake.close()
+        self._loop.run_until_complete(run())
+
+
+class Backend(AsyncTestCase):
+    def test_receive_by_id(self):
+        async def test(backend, fake):
+            ids = [await backend.send(types.DriverClose(name)) for name in ("a", "b")]
+            for _ in ids:
+                request = await fake.request()
+                fake.respond("Driver", {"id": request["data"]["driverId"]}, request["id"])
+            self.assertEqual((await backend.receive(id=ids[1])).id, "b")
+            self.assertEqual((await backend.receive(id=ids[0])).id, "a")
+        self.run_test(test)
+
+    def test_out_of_order(self):
+        async def test(backend, fake):
+            ids = [await backend.send(types.DriverClose(name)) for name in ("a", "b", "c")]
+            requests = [await fake.request() for _ in ids]
+            for request in reversed(requests):
+                fake.respond("Driver", {"id": request["data"]["driverId"]}, request["id"])
+            received = await asyncio.gather(*[backend.receive(id=id) for id in ids])
+            self.assertEqual([res.id for res in received], ["a", "b", "c"])
+        self.run_test(test)
+
+    def test_without_id_answers_oldest(self):
+        async def test(backend, fake):
+            first = await backend.send(types.DriverClose("a"))
+            second = await backend.send(types.DriverClose("b"))
+            fake.respond("Driver", {"id": "a"})
+            fake.respond("Driver", {"id": "b"})
+            self.assertEqual((await backend.receive(id=second)).id, "b")
+            self.assertEqual((await backend.receive(id=first)).id, "a")
+        self.run_test(test)
+
+    def test_timeout(self):
+        async def test(backend, fake):
+            late = await backend.send(types.DriverClose("late"))
+            with self.assertRaises(asyncio.TimeoutError):
+                await backend.receive(timeout=0.1)
+            # Neither the late response nor one without id go to the
+            # request given up on
+            await backend.send(types.DriverClose("next"))
+            fake.respond("Driver", {"id": "late"}, late)
+            fake.respond("Driver", {"id": "next"})
+            self.assertEqual((await backend.receive(timeout=1)).id, "next")
+        self.run_test(test)
+
+    def test_error(self):
+        async def test(backend, fake):
+            await backend.send(types.DriverClose("a"))
+            request = await fake.request()
+            fake.respond("BackendError", {"msg": "broken"}, request["id"])
+            with self.assertRaises(types.BackendError):
+                await backend.receive()
+        self.run_test(test)
+
+
+class Frontend(AsyncTestCase):
+    def test_iterate_in_batches(self):
+        async def test(backend, fake):
+            async def serve():
+                request = await fake.request()
+                self.assertEqual(request["name"], "NewDriver")
+                fake.respond("Driver", {"id": "d"}, request["id"])
+                request = await fake.request()
+                fake.respond("Session", {"id": "s"}, request["id"])
+                request = await fake.request()
+                self.assertEqual(request["data"]["cypher"], "RETURN 1 AS n")
+                fake.respond("Result", {"id": "r", "keys": ["n"]}, request["id"])
+                values = iter(range(3))
+                while True:
+                    request = await fake.request()
+                    self.assertEqual(request["name"], "ResultNextBatch")
+                    records = [{"values": [{"name": "CypherInt", "data": {"value": v}}]}
+                               for _, v in zip(range(2), values)]
+                    fake.respond("Records", {"records": [{"name": "Record", "data": r} for r in records]},
+                                 request["id"])
+                    if len(records) < 2:
+                        return
+
+            serving = asyncio.get_event_loop().create_task(serve())
+            driver = await AsyncDriver.create(backend, "bolt://localhost", AuthorizationToken(scheme="basic"))
+            session = await driver.session("r")
+            result = await session.run("RETURN 1 AS n")
+            result.batchSize = 2
+            values = [record.values[0].value async for record in result]
+            await serving
+            self.assertEqual(values, [0, 1, 2])
+        self.run_test(test)
+
+
+if __name__ == "__main__":
+    unittest.main()
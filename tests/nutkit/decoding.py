@@ -0,0 +1,46 @@
+"""
+Decoding of backend responses by nutkit, runs without a backend:
+
+    python -m unittest tests.nutkit.decoding
+"""
+import json
+import unittest
+
+from nutkit.backend.backend import decode_hook
+import nutkit.protocol as types
+
+
+def decode(text):
+    return json.loads(text, object_hook=decode_hook)
+
+
+class Decoding(unittest.TestCase):
+    def test_null_forms(self):
+        for text in ['{"name": "CypherNull", "data": {}}',
+                     '{"name": "CypherNull"}',
+                     '{"name": "CypherNull", "data": null}',
+                     '{"name": "CypherNull", "data": {"value": null}}']:
+            with self.subTest(text=text):
+                value = decode(text)
+                self.assertIsInstance(value, types.CypherNull)
+                self.assertIsNone(value.value)
+
+    def test_record(self):
+        record = decode('{"name": "Record", "data": {"values": ['
+                        '{"name": "CypherNull", "data": {}},'
+                        '{"name": "CypherInt", "data": {"value": 1}}]}}')
+        self.assertEqual(record, types.Record(values=[types.CypherNull(), types.CypherInt(1)]))
+
+    def test_records_without_records(self):
+        for text in ['{"name": "Records", "data": {}}',
+                     '{"name": "Records", "data": {"records": null}}']:
+            with self.subTest(text=text):
+                self.assertEqual(decode(text).records, [])
+
+    def test_map_with_name_key(self):
+        value = decode('{"name": "CypherMap", "data": {"value": {"name": {"name": "CypherString", "data": {"value": "x"}}}}}')
+        self.assertEqual(value, types.CypherMap({"name": types.CypherString("x")}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Runs the stub server workloads of tests.perf.workloads against the driver
+backend, writing records/sec, bytes/sec and latencies of each workload to
+<artifacts>/perf/<driver>-<branch>.json.
+
+Results are compared to the baseline of the driver and branch, a file of the
+same format in the baselines folder. The suite fails when a workload
+receives fewer records per second than the baseline by more than the
+threshold. Without a baseline there is nothing to compare with.
+
+Baselines are versioned in tests/perf/baselines. A new baseline is written to
+<artifacts>/perf/baselines, to be copied there, so that a run never changes
+the checkout.
+
+The suite takes long for backends that fetch one record per request, so the
+test run only includes it with TEST_PERF=1.
+
+Uses environment variables for configuration, besides those of tests.shared
+and tests.stub.shared:
+
+TEST_BRANCH               Name of the testkit branch, default is local
+TEST_PERF_SCALE           Factor to scale the number of records of each
+                          workload by, default is 1
+TEST_PERF_THRESHOLD       Fraction that throughput may drop below the
+                          baseline by, default is 0.2
+TEST_PERF_BASELINES       Folder of baselines, default is tests/perf/baselines
+TEST_PERF_UPDATE_BASELINE Set to 1 to write the results as a new baseline
+TEST_ARTIFACTS_PATH       Where to write the results, default is artifacts
+"""
+import json
+import os
+import sys
+
+from tests.perf.workloads import workloads
+from tests.shared import new_backend, get_driver_name
+from tests.stub.shared import StubServer
+from tests.testenv import begin_test_suite, end_test_suite
+
+
+def compare(results, baseline, threshold):
+    """ Names of workloads regressed compared to the baseline.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        expected = baseline.get(name)
+        if not expected:
+            print("%-14s no baseline" % name)
+            continue
+        ratio = result["recordsPerSecond"] / expected["recordsPerSecond"]
+        print("%-14s %6.1f%% of baseline" % (name, ratio * 100))
+        if ratio < 1 - threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    driver = get_driver_name()
+    branch = os.environ.get("TEST_BRANCH", "local")
+    scale = float(os.environ.get("TEST_PERF_SCALE", 1))
+    threshold = float(os.environ.get("TEST_PERF_THRESHOLD", 0.2))
+    baselines = os.environ.get("TEST_PERF_BASELINES",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines"))
+    fileName = "%s-%s.json" % (driver, branch)
+
+    results = {}
+    backend = new_backend()
+    server = StubServer()
+    try:
+        for workload in workloads(scale):
+            result = workload.run(backend, server)
+            results[workload.name] = result
+            print("%-14s %9d records %10.1f records/s %8.2f MB/s  p50 %7.1fms  p99 %7.1fms"
+                  % (workload.name, result["records"], result["recordsPerSecond"],
+                     result["bytesPerSecond"] / 1e6, result["latency"]["p50"] * 1000,
+                     result["latency"]["p99"] * 1000))
+    finally:
+        server.reset()
+        backend.close()
+
+    artifacts = os.path.join(os.environ.get("TEST_ARTIFACTS_PATH", "artifacts"), "perf")
+    os.makedirs(artifacts, exist_ok=True)
+    path = os.path.join(artifacts, fileName)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Wrote %s" % path)
+
+    baselinePath = os.path.join(baselines, fileName)
+    if os.environ.get("TEST_PERF_UPDATE_BASELINE") == "1":
+        path = os.path.join(artifacts, "baselines")
+        os.makedirs(path, exist_ok=True)
+        path = os.path.join(path, fileName)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print("Wrote baseline %s, copy it to %s to compare with it" % (path, baselinePath))
+        return True
+    if not os.path.exists(baselinePath):
+        print("No baseline %s" % baselinePath)
+        return True
+    with open(baselinePath) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, threshold)
+    if regressions:
+        print("Regressed more than %d%%: %s" % (threshold * 100, ", ".join(regressions)))
+    return not regressions
+
+
+if __name__ == "__main__":
+    suite_name = "Performance tests"
+    begin_test_suite(suite_name)
+    passed = main()
+    end_test_suite(suite_name)
+    if not passed:
+        sys.exit(-1)
@@ -0,0 +1,134 @@
+"""
+Fixed workloads played by the stub server to measure how fast a driver
+receives records. Each workload is a generated Bolt 4 script, serving its
+records in batches of 1000 as asked for by the default fetch size, using
+<REPEAT> lines so that the script stays small however many records it has.
+"""
+import json
+import time
+
+from boltstub.scripting import BoltScript, ServerMessageLine, ServerRepeatLine
+from nutkit.frontend import Driver, AuthorizationToken
+from tests.stress.workload import percentile
+
+header = """
+!: BOLT 4
+!: AUTO HELLO
+!: AUTO GOODBYE
+!: AUTO RESET
+"""
+
+fetchSize = 1000
+
+
+def result_lines(record, count):
+    """ Script lines answering a query with count records, a JSON list with
+    $i as the index of each record.
+    """
+    lines = ['C: RUN "RETURN 1 AS n" {} {}',
+             '   PULL {"n": %d}' % fetchSize,
+             'S: SUCCESS {"fields": ["n"]}']
+    remaining = count
+    while True:
+        n = min(fetchSize, remaining)
+        remaining -= n
+        if n:
+            lines.append("S: <REPEAT %d> RECORD %s" % (n, record))
+        if not remaining:
+            lines.append('S: SUCCESS {"type": "r"}')
+            return lines
+        lines.append('S: SUCCESS {"has_more": true}')
+        lines.append('C: PULL {"n": %d}' % fetchSize)
+
+
+def script_size(script):
+    """ Number of bytes of the messages sent by the stub server as scripted,
+    besides the automatic responses.
+    """
+    size = 0
+    for line in BoltScript.parse(script):
+        if isinstance(line, ServerRepeatLine):
+            size += sum(map(len, line.messages()))
+        elif isinstance(line, ServerMessageLine):
+            size += len(line.data)
+    return size
+
+
+class Workload:
+    def __init__(self, name, record, records, queries=1):
+        self.name = name
+        # Records per query
+        self.records = records
+        self.queries = queries
+        lines = result_lines(record, records)
+        self.script = "\n".join([header] + lines * queries)
+        # Number of bytes of the messages sent by the stub server, besides
+        # the automatic responses, the same for each query
+        self.size = script_size("\n".join([header] + lines)) * queries
+
+    def run(self, backend, server):
+        """ Plays the workload, returns the measurements.
+        """
+        server.start(script=self.script)
+        driver = Driver(backend, "bolt://%s" % server.address, AuthorizationToken(scheme="basic"))
+        session = driver.session("w")
+        latencies = []
+        firstRecords = []
+        count = 0
+        start = time.perf_counter()
+        for _ in range(self.queries):
+            queryStart = time.perf_counter()
+            result = session.run("RETURN 1 AS n")
+            first = None
+            for record in result:
+                if first is None:
+                    first = time.perf_counter() - queryStart
+                count += 1
+            latencies.append(time.perf_counter() - queryStart)
+            firstRecords.append(first)
+        elapsed = time.perf_counter() - start
+        session.close()
+        driver.close()
+        server.done()
+        if count != self.records * self.queries:
+            raise Exception("Expected %d records but got %d"
+                            % (self.records * self.queries, count))
+        size = self.size
+        latencies.sort()
+        firstRecords.sort()
+        return {
+            "queries": self.queries,
+            "records": count,
+            "bytes": size,
+            "seconds": elapsed,
+            "recordsPerSecond": count / elapsed,
+            "bytesPerSecond": size / elapsed,
+            "latency": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+            },
+            "firstRecord": percentile(firstRecords, 50),
+        }
+
+
+def nested(depth):
+    value = "$i"
+    for level in range(depth):
+        value = '{"level": %d, "list": [1, 2.5, "x"], "nested": %s}' % (level, value)
+    return value
+
+
+def workloads(scale=1.0):
+    """ All workloads, with their number of records scaled.
+    """
+    def scaled(n):
+        return max(int(n * scale), 1)
+
+    wide = json.dumps(["column %d" % i for i in range(50)] + list(range(50)))
+    return [
+        Workload("small_records", "[$i]", scaled(1000000)),
+        Workload("wide_records", "[$i, %s]" % wide[1:-1], scaled(20000)),
+        Workload("nested_maps", "[%s]" % nested(10), scaled(20000)),
+        Workload("small_queries", "[$i]", 1, queries=scaled(2000)),
+    ]
@@ -0,0 +1,81 @@
+"""
+Runs the stress workload against a Neo4j server through the driver backend,
+writing throughput and latency percentiles of each operation to
+<artifacts>/stress/<driver>-<name>.json, where name is given as argument.
+
+Uses environment variables for configuration, besides those of tests.shared
+and tests.neo4j.shared:
+
+TEST_NEO4J_SCHEME         URI scheme the driver connects with, default is
+                          bolt
+TEST_STRESS_MIX           Weights of operations, default is
+                          "read:6,write:2,txfunc:2"
+TEST_STRESS_WORKERS       Number of concurrent sessions, default is 1 since
+                          not all backends handle concurrent requests
+TEST_STRESS_CONNECTIONS   Number of connections to the backend the sessions
+                          are spread over, default is 1
+TEST_STRESS_DURATION      Number of seconds to run for, default is 10
+TEST_ARTIFACTS_PATH       Where to write the report, default is artifacts
+"""
+import asyncio
+import json
+import os
+import sys
+
+from tests.neo4j.shared import (
+        get_authorization, get_neo4j_host_and_port, wait_for_neo4j)
+from tests.shared import get_backend_host_and_port, get_driver_name
+from tests.stress.workload import Stress, parse_mix
+from tests.testenv import begin_test_suite, end_test_suite
+
+
+def main(name):
+    host, port = get_neo4j_host_and_port()
+    scheme = os.environ.get("TEST_NEO4J_SCHEME", "bolt")
+    backendHost, backendPort = get_backend_host_and_port()
+    stress = Stress((backendHost, int(backendPort)),
+                    "%s://%s:%d" % (scheme, host, int(port)),
+                    get_authorization(),
+                    parse_mix(os.environ.get("TEST_STRESS_MIX", "read:6,write:2,txfunc:2")),
+                    workers=int(os.environ.get("TEST_STRESS_WORKERS", 1)),
+                    connections=int(os.environ.get("TEST_STRESS_CONNECTIONS", 1)),
+                    duration=float(os.environ.get("TEST_STRESS_DURATION", 10)))
+    report = asyncio.run(stress.run())
+    driver = get_driver_name()
+    report["driver"] = driver
+    report["name"] = name
+
+    path = os.path.join(os.environ.get("TEST_ARTIFACTS_PATH", "artifacts"), "stress")
+    os.makedirs(path, exist_ok=True)
+    path = os.path.join(path, "%s-%s.json" % (driver, name))
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for op, summary in sorted(report["operations"].items()) + [("total", report["total"])]:
+        latency = summary["latency"]
+        if summary["count"]:
+            print("%-8s %8d ops %8.1f ops/s  p50 %7.1fms  p95 %7.1fms  p99 %7.1fms  %d errors"
+                  % (op, summary["count"], summary["throughput"], latency["p50"] * 1000,
+                     latency["p95"] * 1000, latency["p99"] * 1000, summary["errors"]))
+        else:
+            print("%-8s %8d ops  %d errors" % (op, summary["count"], summary["errors"]))
+    for error in report["firstErrors"]:
+        print("Error %s" % error)
+    print("Wrote %s" % path)
+    return not report["total"]["errors"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Missing name parameter")
+        sys.exit(-10)
+    name = sys.argv[1]
+    if not wait_for_neo4j():
+        print("Neo4j server is not ready")
+        sys.exit(-1)
+    suite_name = "Stress tests " + name
+    begin_test_suite(suite_name)
+    passed = main(name)
+    end_test_suite(suite_name)
+    if not passed:
+        sys.exit(-1)
@@ -0,0 +1,181 @@
+"""
+Load generator running a mix of read, write and transaction function
+operations from many concurrent sessions through the asyncio nutkit
+frontend, timing every operation.
+
+Each worker is a coroutine with its own session, picking operations at
+random by weight until the duration is up. Workers are spread over one or
+more connections to the backend.
+"""
+import asyncio
+import math
+import random
+import time
+
+import nutkit.protocol as types
+from nutkit.backend import AsyncBackend
+from nutkit.frontend import AsyncDriver
+
+# Label of all nodes created, deleted when done
+label = "TestkitStress"
+
+
+async def read(driver):
+    session = await driver.session("r")
+    try:
+        result = await session.run("UNWIND range(1, 10) AS x RETURN x")
+        async for record in result:
+            pass
+    finally:
+        await session.close()
+
+
+async def write(driver):
+    session = await driver.session("w")
+    try:
+        result = await session.run("CREATE (n:%s {at: $at}) RETURN n.at" % label,
+                                   {"at": types.CypherFloat(time.time())})
+        async for record in result:
+            pass
+    finally:
+        await session.close()
+
+
+async def txfunc(driver):
+    async def work(tx):
+        result = await tx.run("CREATE (n:%s {at: $at}) RETURN n.at" % label,
+                              {"at": types.CypherFloat(time.time())})
+        async for record in result:
+            pass
+        result = await tx.run("MATCH (n:%s) RETURN count(n)" % label)
+        async for record in result:
+            pass
+
+    session = await driver.session("w")
+    try:
+        await session.writeTransaction(work)
+    finally:
+        await session.close()
+
+
+operations = {
+    "read": read,
+    "write": write,
+    "txfunc": txfunc,
+}
+
+
+def parse_mix(mix):
+    """ Weights by operation name from "read:6,write:2,txfunc:2".
+    """
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition(":")
+        if name not in operations:
+            raise Exception("Unknown stress operation %s" % name)
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(ordered, p):
+    """ Nearest rank percentile of sorted values.
+    """
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "throughput": len(ordered) / elapsed,
+        "latency": {
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1] if ordered else None,
+        },
+    }
+
+
+class Stress:
+    def __init__(self, backendAddress, uri, authToken, weights, workers=1,
+                 connections=1, duration=10):
+        self._backendAddress = backendAddress
+        self._uri = uri
+        self._authToken = authToken
+        self._weights = weights
+        self._workers = workers
+        self._connections = connections
+        self._duration = duration
+        # Seconds taken by each successful operation, by name
+        self._latencies = {name: [] for name in weights}
+        self._errors = {name: 0 for name in weights}
+        self._firstErrors = []
+
+    async def _work(self, driver, deadline):
+        names = list(self._weights)
+        weights = [self._weights[name] for name in names]
+        while time.monotonic() < deadline:
+            name = random.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                await operations[name](driver)
+            except Exception as e:
+                self._errors[name] += 1
+                if len(self._firstErrors) < 10:
+                    self._firstErrors.append("%s: %r" % (name, e))
+                if isinstance(e, (types.BackendError, OSError)):
+                    # Backend or connection to it is broken, nothing more
+                    # to measure for this worker
+                    return
+                # Failures may be immediate, let the other workers run
+                await asyncio.sleep(0)
+                continue
+            self._latencies[name].append(time.perf_counter() - start)
+
+    async def _cleanup(self, driver):
+        session = await driver.session("w")
+        try:
+            result = await session.run("MATCH (n:%s) DETACH DELETE n" % label)
+            await result.consume()
+        finally:
+            await session.close()
+
+    async def run(self):
+        """ Runs the workload, returns the report.
+        """
+        host, port = self._backendAddress
+        backends = []
+        drivers = []
+        try:
+            for _ in range(self._connections):
+                backend = await AsyncBackend.connect(host, port)
+                backends.append(backend)
+                drivers.append(await AsyncDriver.create(backend, self._uri, self._authToken))
+            start = time.monotonic()
+            deadline = start + self._duration
+            await asyncio.gather(*[self._work(drivers[i % len(drivers)], deadline)
+                                   for i in range(self._workers)])
+            elapsed = time.monotonic() - start
+            await self._cleanup(drivers[0])
+        finally:
+            for driver in drivers:
+                await driver.close()
+            for backend in backends:
+                await backend.close()
+
+        everything = [x for latencies in self._latencies.values() for x in latencies]
+        return {
+            "uri": self._uri,
+            "workers": self._workers,
+            "connections": self._connections,
+            "duration": elapsed,
+            "mix": self._weights,
+            "operations": {name: summarize(self._latencies[name], self._errors[name], elapsed)
+                           for name in self._weights},
+            "total": summarize(everything, sum(self._errors.values()), elapsed),
+            "firstErrors": self._firstErrors,
+        }
@@ -27,7 +27,7 @@ S: SUCCESS {"bookmark": "bm"}
 class Tx(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
         uri = "bolt://%s" % self._server.address
         self._driver = Driver(self._backend, uri, AuthorizationToken(scheme="basic"))
 
@@ -39,7 +39,7 @@ S: <EXIT>
 class SessionRunDisconnected(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
         self._driverName = get_driver_name()
         auth = AuthorizationToken(scheme="basic", principal="neo4j", credentials="pass")
         uri = "bolt://%s" % self._server.address
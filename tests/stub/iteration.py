@@ -64,7 +64,7 @@ class SessionRun(unittest.TestCase):
 
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
 
     def tearDown(self):
         self._backend.close()
@@ -139,7 +139,7 @@ class TxRun(unittest.TestCase):
 
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
 
     def tearDown(self):
         self._backend.close()
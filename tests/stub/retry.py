@@ -97,7 +97,7 @@ S: <EXIT>
 class TestRetry(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
         self._driverName = get_driver_name()
 
     def tearDown(self):
@@ -19,9 +19,9 @@ def get_extra_hello_props():
 class Routing(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._routingServer = StubServer(9001)
-        self._readServer = StubServer(9002)
-        self._writeServer = StubServer(9003)
+        self._routingServer = StubServer()
+        self._readServer = StubServer()
+        self._writeServer = StubServer()
         self._uri = "neo4j://%s?region=china&policy=my_policy" % self._routingServer.address
         self._auth = AuthorizationToken(scheme="basic", principal="p", credentials="c")
         self._userAgent = "007"
@@ -43,7 +43,7 @@ class Routing(unittest.TestCase):
         C: RUN "CALL dbms.routing.getRoutingTable($context, $#DBPARAM#)" {"context": #ROUTINGCTX#, "#DBPARAM#": "adb"} {"mode": "r", "db": "system"}
         C: PULL {"n": -1}
         S: SUCCESS {"fields": ["ttl", "servers"]}
-        S: RECORD [1000, [{"addresses": ["#HOST#:9001"], "role":"ROUTE"}, {"addresses": ["#HOST#:9002"], "role":"READ"}, {"addresses": ["#HOST#:9003"], "role":"WRITE"}]]
+        S: RECORD [1000, [{"addresses": ["#HOST#:#ROUTER_PORT#"], "role":"ROUTE"}, {"addresses": ["#HOST#:#READER_PORT#"], "role":"READ"}, {"addresses": ["#HOST#:#WRITER_PORT#"], "role":"WRITE"}]]
         S: SUCCESS {"type": "r"}
         """
 
@@ -115,7 +115,10 @@ class Routing(unittest.TestCase):
             "#VERSION#": "4.1",
             "#DBPARAM#": "db",
             "#HOST#": host,
-            "#ROUTINGCTX#": '{"address": "' + host + ':9001", "region": "china", "policy": "my_policy"}',
+            "#ROUTER_PORT#": self._routingServer.port,
+            "#READER_PORT#": self._readServer.port,
+            "#WRITER_PORT#": self._writeServer.port,
+            "#ROUTINGCTX#": '{"address": "' + self._routingServer.address + '", "region": "china", "policy": "my_policy"}',
             "#EXTRA_HELLO_PROPS#": get_extra_hello_props(),
         }
         v["#HELLO_ROUTINGCTX#"] = v["#ROUTINGCTX#"]
@@ -205,7 +208,7 @@ class RoutingV3(Routing):
         C: RUN "CALL dbms.cluster.routing.getRoutingTable($context)" {"context": #ROUTINGCTX#} {#ROUTINGMODE#}
         C: PULL_ALL
         S: SUCCESS {"fields": ["ttl", "servers"]}
-        S: RECORD [1000, [{"addresses": ["#HOST#:9001"], "role":"ROUTE"}, {"addresses": ["#HOST#:9002"], "role":"READ"}, {"addresses": ["#HOST#:9003"], "role":"WRITE"}]]
+        S: RECORD [1000, [{"addresses": ["#HOST#:#ROUTER_PORT#"], "role":"ROUTE"}, {"addresses": ["#HOST#:#READER_PORT#"], "role":"READ"}, {"addresses": ["#HOST#:#WRITER_PORT#"], "role":"WRITE"}]]
         S: SUCCESS {"type": "r"}
         """
 
@@ -277,7 +280,10 @@ class RoutingV3(Routing):
             "#VERSION#": 3,
             "#HOST#": host,
             "#ROUTINGMODE#": "",
-            "#ROUTINGCTX#": '{"address": "' + host + ':9001", "region": "china", "policy": "my_policy"}',
+            "#ROUTER_PORT#": self._routingServer.port,
+            "#READER_PORT#": self._readServer.port,
+            "#WRITER_PORT#": self._writeServer.port,
+            "#ROUTINGCTX#": '{"address": "' + self._routingServer.address + '", "region": "china", "policy": "my_policy"}',
             "#EXTRA_HELLO_PROPS#": get_extra_hello_props(),
             "#EXTR_HELLO_ROUTING_PROPS#": "",
         }
@@ -300,7 +306,7 @@ class RoutingV3(Routing):
 class NoRouting(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
 
     def tearDown(self):
         self._backend.close()
@@ -95,7 +95,7 @@ S: SUCCESS {"fields": ["n"]}
 class SessionRunParameters(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
         self._driverName = get_driver_name()
         auth = AuthorizationToken()
         uri = "bolt://%s" % self._server.address
@@ -1,39 +1,247 @@
 """ Shared utilities for writing stub tests
 
 Uses environment variables for configuration:
+
+TEST_STUB_HOST    Host name of the stub servers, as seen from the driver,
+                  defaults to 127.0.0.1
+TEST_STUB_MODE    How stub servers are run, either "daemon" (default) for
+                  a single boltstub daemon serving all stub servers of the
+                  test run, "inprocess" for a thread of the test process per
+                  stub server, or "subprocess" for a new process per stub
+                  server
+TEST_STUB_DAEMON  Control address of an already running boltstub daemon, by
+                  default one is started on first use
+
+Stub servers created without a port number listen on a free port reserved
+by the daemon, or held by the test process in the other modes, so tests can
+run in parallel.
 """
+import atexit
+import json
 import subprocess
 import os
+import socket
 import tempfile
 import platform
-import time
+import threading
+
+from boltstub import BoltStubService
+from boltstub.scripting import BoltScript
+
+
+def _python_command():
+    if platform.system() == "Windows":
+        return "python"
+    return "python3"
+
+
+class StubDaemon:
+    """ Connection to the boltstub daemon, which is started on first use
+    unless TEST_STUB_DAEMON is set.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process = None
+        self._address = None
+        # Control connections not in use by a request, as the daemon
+        # answers the requests on a connection one at a time
+        self._idle = []
+
+    def address(self):
+        """ Control address of the daemon, which is started if required.
+        """
+        address = os.environ.get("TEST_STUB_DAEMON")
+        if address:
+            return address
+        with self._lock:
+            if not self._process:
+                self._process = subprocess.Popen([_python_command(),
+                                                  "-m",
+                                                  "boltstub.daemon",
+                                                  "-l",
+                                                  "127.0.0.1:0"],
+                                                 stdout=subprocess.PIPE,
+                                                 close_fds=True,
+                                                 encoding='utf-8')
+                atexit.register(self.close)
+                line = self._process.stdout.readline().strip()
+                if not line.startswith("Listening "):
+                    raise Exception("Stub daemon failed to start")
+                self._address = line.split()[1]
+            return self._address
+
+    def _connect(self):
+        host, _, port = self.address().rpartition(":")
+        connection = socket.create_connection((host, int(port)))
+        file = connection.makefile("rw", encoding="utf-8")
+        connection.close()
+        return file
+
+    def request(self, name, **data):
+        with self._lock:
+            file = self._idle.pop() if self._idle else None
+        if file is None:
+            file = self._connect()
+        data["name"] = name
+        try:
+            file.write(json.dumps(data) + "\n")
+            file.flush()
+            line = file.readline()
+        except Exception:
+            file.close()
+            raise
+        if not line:
+            file.close()
+            raise Exception("Stub daemon exited")
+        with self._lock:
+            self._idle.append(file)
+        response = json.loads(line)
+        if "error" in response:
+            raise Exception(response["error"])
+        return response
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for file in idle:
+            file.close()
+        if self._process:
+            self._process.kill()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+
+daemon = StubDaemon()
+
+
+def _bind_port(port=0):
+    """ Socket bound to the port, or to a free one, which holds the port
+    until closed just before a stub server binds it.
+    """
+    s = socket.socket()
+    try:
+        s.bind(("0.0.0.0", port))
+    except OSError:
+        s.close()
+        raise
+    return s
 
 
 class StubServer:
-    def __init__(self, port):
+    def __init__(self, port=None):
+        """ Without a port number, a free port is reserved for the stub
+        server, allowing tests to run in parallel.
+        """
+        self._mode = os.environ.get("TEST_STUB_MODE", "daemon")
+        self._reserved = False
+        # Socket holding the reserved port while no stub server runs on it,
+        # when not reserved by the daemon
+        self._port_socket = None
+        if port is None:
+            if self._mode in ("inprocess", "subprocess"):
+                self._port_socket = _bind_port()
+                port = self._port_socket.getsockname()[1]
+                self._reserved = True
+            else:
+                port = daemon.request("reserve")["port"]
+                self._reserved = True
         self.host = os.environ.get("TEST_STUB_HOST", "127.0.0.1")
         self.address = "%s:%d" % (self.host, port)
         self.port = port
         self._process = None
+        self._script_path = None
+        self._running = False
+        self._service = None
+        self._thread = None
+        self._error = None
+        # Per connection played, the script lines with the number of
+        # seconds each one took, only collected when running in process
+        self.timings = []
 
     def start(self, path=None, script=None, vars={}):
-        if self._process:
+        if self._process or self._running or self._thread:
             raise Exception("Stub server in use")
 
-        if platform.system() == "Windows":
-            pythonCommand = "python"
+        if self._mode == "subprocess":
+            self._start_process(path, script, vars)
+            return
+
+        if self._mode == "inprocess":
+            self._start_thread(path, script, vars)
+            return
+
+        if script:
+            path = None
         else:
-            pythonCommand = "python3"
+            with open(path) as f:
+                script = f.read()
+        for v in vars:
+            script = script.replace(v, str(vars[v]))
+        daemon.request("start", script=script, filename=path,
+                       listen="0.0.0.0:%d" % self.port)
+        self._running = True
+
+    def _start_thread(self, path, script, vars):
+        if script:
+            for v in vars:
+                script = script.replace(v, str(vars[v]))
+            script = BoltScript.parse(script)
+        else:
+            script = BoltScript.load(path)
+        self._release_port_socket()
+        try:
+            self._service = BoltStubService(script, listen_addr="0.0.0.0:%d" % self.port)
+        except Exception:
+            self._hold_port()
+            raise
+        self._error = None
+        self.timings = []
+        self._thread = threading.Thread(target=self._run_service, daemon=True)
+        self._thread.start()
+
+    def _run_service(self):
+        try:
+            self._service.start()
+        except Exception as e:
+            self._error = e
 
+    def _join_thread(self, timeout):
+        """ Waits for the in process stub server to finish, raising any
+        script mismatch or other error it ran into.
+        """
+        self._thread.join(timeout)
+        hanged = self._thread.is_alive()
+        if hanged:
+            self._service.stop()
+            self._thread.join()
+        service = self._service
+        self._thread = None
+        self._service = None
+        self._hold_port()
+        self.timings = [actor.timings for actor in service.actors]
+        if self._error:
+            raise self._error
+        if service.exceptions:
+            raise service.exceptions[0]
+        if hanged:
+            raise Exception("Stub server hanged")
+        if service.timed_out:
+            # Exit code 2 of the other modes, reported as unclean there too
+            raise Exception("Stub server exited unclean, timed out waiting for a connection")
+
+    def _start_process(self, path, script, vars):
         if script:
-            tempdir = tempfile.gettempdir()
-            path = os.path.join(tempdir, "temp.script")
+            fd, path = tempfile.mkstemp(suffix=".script")
+            self._script_path = path
             for v in vars:
                 script = script.replace(v, str(vars[v]))
-            with open(path, "w") as f:
+            with os.fdopen(fd, "w") as f:
                 f.write(script)
 
-        self._process = subprocess.Popen([pythonCommand,
+        self._release_port_socket()
+        self._process = subprocess.Popen([_python_command(),
                                           "-m",
                                           "boltstub",
                                           "-l",
@@ -45,17 +253,40 @@ class StubServer:
                                          close_fds=True,
                                          encoding='utf-8')
 
-        # Wait until something is written to know it started, requires
-        polls = 100
-        while polls and self._process.stdout.readline().strip() != "Listening":
-            time.sleep(0.1)
-            polls -= 1
+        # Wait until "Listening" is written to know it started, a missing
+        # script would exit the process immediately instead
+        listening = threading.Event()
 
-        # Double check that the process started, a missing script would exit
-        # process immediately
+        def wait_listening():
+            for line in self._process.stdout:
+                if line.strip() == "Listening":
+                    listening.set()
+                    return
+            listening.set()
+
+        threading.Thread(target=wait_listening, daemon=True).start()
+        if not listening.wait(10):
+            self._kill()
+            raise Exception("Stub server did not start")
+
+        # Double check that the process started
         if self._process.poll():
             self._dump()
             self._process = None
+            self._hold_port()
+
+    def _release_port_socket(self):
+        if self._port_socket:
+            self._port_socket.close()
+            self._port_socket = None
+
+    def _hold_port(self):
+        # Bind the reserved port again once its stub server has finished
+        if self._reserved and self._mode != "daemon" and not self._port_socket:
+            try:
+                self._port_socket = _bind_port(self.port)
+            except OSError:
+                pass
 
     def _dump(self):
         # print("")
@@ -71,49 +302,87 @@ class StubServer:
 
         self._close_pipes()
 
+    def _dump_output(self, output):
+        print(">>>> Captured stub server %s output" % self.address)
+        print(output)
+        print("<<<< Captured stub server %s output" % self.address)
+
     def _close_pipes(self):
         self._process.stdout.close()
         self._process.stderr.close()
+        if self._script_path:
+            os.remove(self._script_path)
+            self._script_path = None
 
     def _kill(self):
         self._process.kill()
         self._process.wait()
         self._dump()
         self._process = None
+        self._hold_port()
 
     def done(self):
         """ Checks if the server stopped nicely (processes exited with 0),
         if so this method is done.
         If the server process exited with non 0, an exception will be raised.
-        If the server process is running it will be polled until timeout and
-          proceed as above.
-        If the server process is still running after polling it will be killed
-          and an exception will be raised.
+        If the server process is running it will be waited for until timeout
+          and proceed as above.
+        If the server process is still running after the timeout it will be
+          killed and an exception will be raised.
+        When running in process, a script mismatch is raised as such, and
+          so is a timeout waiting for the driver to connect.
         """
-        if not self._process:
+        if self._thread:
+            self._join_thread(20)
             return
 
-        polls = 200
-        while polls:
-            self._process.poll()
-            if self._process.returncode is None:
-                time.sleep(0.1)
-                polls -= 1
-            else:
-                if self._process.returncode:
-                    self._dump()
-                    self._process = None
-                    raise Exception("Stub server exited unclean")
-                self._close_pipes()
-                self._process = None
-                return
+        if self._running:
+            self._running = False
+            response = daemon.request("done", port=self.port, timeout=20)
+            exit_code = response["exit_code"]
+            if exit_code is None:
+                self._dump_output(response["output"])
+                raise Exception("Stub server hanged")
+            if exit_code:
+                self._dump_output(response["output"])
+                raise Exception("Stub server exited unclean")
+            return
 
-        self._kill()
-        raise Exception("Stub server hanged")
+        if not self._process:
+            return
+
+        try:
+            self._process.wait(20)
+        except subprocess.TimeoutExpired:
+            self._kill()
+            raise Exception("Stub server hanged")
+        if self._process.returncode:
+            self._dump()
+            self._process = None
+            self._hold_port()
+            raise Exception("Stub server exited unclean")
+        self._close_pipes()
+        self._process = None
+        self._hold_port()
 
     def reset(self):
+        if self._thread:
+            try:
+                self._join_thread(0)
+            except Exception as e:
+                print("Stub server %s: %s" % (self.address, e))
+        if self._running:
+            self._running = False
+            response = daemon.request("kill", port=self.port)
+            self._dump_output(response["output"])
         if self._process:
             self._kill()
+        if self._reserved:
+            self._reserved = False
+            if self._mode == "daemon":
+                daemon.request("release", port=self.port)
+            else:
+                self._release_port_socket()
 
 
 scripts_path = os.path.join(
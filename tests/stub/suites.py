@@ -1,8 +1,14 @@
 """
 Defines stub suites
+
+Uses environment variables for configuration:
+
+TEST_STUB_WORKERS  Number of worker processes to spread the tests over,
+                   default is 1 to run all tests serially in this process.
+                   Requires a backend accepting concurrent connections.
 """
 
-import unittest, sys
+import unittest, sys, os, io, contextlib, multiprocessing
 import tests.stub.retry as retry
 import tests.stub.disconnected as disconnected
 import tests.stub.transport as transport
@@ -11,7 +17,8 @@ import tests.stub.txparameters as txparameters
 import tests.stub.routing as routing
 import tests.stub.bookmark as bookmark
 import tests.stub.iteration as iteration
-from tests.testenv import get_test_result_class, begin_test_suite, end_test_suite, in_teamcity
+from tests.stub.shared import daemon
+from tests.testenv import get_test_result_class, begin_test_suite, end_test_suite
 
 loader = unittest.TestLoader()
 
@@ -25,11 +32,59 @@ stub_suite.addTests(loader.loadTestsFromModule(bookmark))
 stub_suite.addTests(loader.loadTestsFromModule(routing))
 stub_suite.addTests(loader.loadTestsFromModule(iteration))
 
+
+def test_ids(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from test_ids(test)
+        else:
+            yield test.id()
+
+
+def run_test(test_id):
+    """ Runs a single test in a worker process, returns its output and
+    whether it passed.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        runner = unittest.TextTestRunner(stream=output, resultclass=get_test_result_class(),
+                                         verbosity=100)
+        result = runner._makeResult()
+        loader.loadTestsFromName(test_id)(result)
+        if not result.wasSuccessful():
+            result.printErrors()
+    return output.getvalue(), result.wasSuccessful()
+
+
+def run_parallel(suite, workers):
+    """ Runs the tests of the suite spread over worker processes, printing
+    the output of each test as a whole once it has finished.
+    """
+    # All workers share a single stub daemon
+    if os.environ.get("TEST_STUB_MODE", "daemon") == "daemon":
+        os.environ["TEST_STUB_DAEMON"] = daemon.address()
+    ids = list(test_ids(suite))
+    failed = 0
+    with multiprocessing.Pool(workers) as pool:
+        for output, passed in pool.imap_unordered(run_test, ids):
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            if not passed:
+                failed += 1
+    print("Ran %d tests over %d workers, %d failed" % (len(ids), workers, failed))
+    return not failed
+
+
 if __name__ == "__main__":
     suiteName = "Stub tests"
     begin_test_suite(suiteName)
-    runner = unittest.TextTestRunner(resultclass=get_test_result_class(), verbosity=100)
-    result = runner.run(stub_suite)
+    workers = int(os.environ.get("TEST_STUB_WORKERS", 1))
+    if workers > 1:
+        passed = run_parallel(stub_suite, workers)
+    else:
+        runner = unittest.TextTestRunner(resultclass=get_test_result_class(), verbosity=100)
+        result = runner.run(stub_suite)
+        passed = not (result.errors or result.failures)
     end_test_suite(suiteName)
-    if result.errors or result.failures:
+    if not passed:
         sys.exit(-1)
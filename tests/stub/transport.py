@@ -28,13 +28,19 @@ S: SUCCESS {"fields": ["n"]}
 class Transport(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
         self._driverName = get_driver_name()
         auth = AuthorizationToken(scheme="basic", principal="neo4j", credentials="pass")
         uri = "bolt://%s" % self._server.address
         self._driver = Driver(self._backend, uri, auth)
         self._session = self._driver.session("w")
 
+    def tearDown(self):
+        self._backend.close()
+        # If test raised an exception this will make sure that the stub server
+        # is killed and it's output is dumped for analys.
+        self._server.reset()
+
     def test_noop(self):
         # Verifies that no op messages sent on bolt chunking layer are ignored. The no op messages
         # are sent from server as a way to notify that the connection is still up.
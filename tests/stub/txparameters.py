@@ -108,7 +108,7 @@ S: SUCCESS {}
 class TxBeginParameters(unittest.TestCase):
     def setUp(self):
         self._backend = new_backend()
-        self._server = StubServer(9001)
+        self._server = StubServer()
         self._driverName = get_driver_name()
         uri = "bolt://%s" % self._server.address
         self._driver = Driver(self._backend, uri, AuthorizationToken(scheme="basic"))
@@ -1,6 +1,5 @@
 import subprocess
 import os
-import time
 import sys
 from nutkit.frontend import Driver, AuthorizationToken
 
@@ -45,19 +44,15 @@ class TlsServer:
         """ Checks that the server has stopped and its exit code to determine
         if driver connected or not.
         """
-        polls = 100
-        while polls:
-            self._process.poll()
-            if self._process.returncode is None:
-                time.sleep(0.1)
-                polls -= 1
-            else:
-                connected = self._process.returncode == 0
-                self._close_pipes()
-                self._process = None
-                return connected
-        self._kill()
-        raise Exception("Timeout")
+        try:
+            self._process.wait(10)
+        except subprocess.TimeoutExpired:
+            self._kill()
+            raise Exception("Timeout")
+        connected = self._process.returncode == 0
+        self._close_pipes()
+        self._process = None
+        return connected
 
     def _dump(self):
         print("")